@@ -0,0 +1,50 @@
+"""Per-client rate limiting for the AI endpoints.
+
+Each client gets a token bucket that refills at ``rate`` tokens per second up
+to ``burst``; a request spends one token or is turned away with the number
+of seconds until the next token is available. Buckets live in memory per
+worker process and the least recently seen clients are dropped once there
+are more than ``max_clients``.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """Token buckets keyed by client"""
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.allowed = 0
+        self.limited = 0
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Spend a token for ``key``; return 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed += 1
+            else:
+                wait = max(1, math.ceil((1 - tokens) / self.rate))
+                self.limited += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self):
+        return {
+            'clients': len(self._buckets),
+            'allowed': self.allowed,
+            'limited': self.limited
+        }
@@ -0,0 +1,184 @@
+"""Cache of chatbot answers that also matches questions asked in other words.
+
+Questions are normalized (lowercased, stop words, filler and the owner's
+name dropped, plurals and synonyms folded) and embedded with
+``QuestionEmbedder``, a bag of words in which words that do not change the
+topic of a question weigh less; a lookup returns the answer of the most
+similar cached question when the cosine similarity reaches ``threshold``.
+So "Which projects did he build?" finds "What projects has he done?", but
+"What Python projects has he done?" does not. Identical normalized
+questions are found without embedding anything. Entries are bounded by ``maxsize`` (least
+recently used evicted) and ``ttl``, and the whole cache is dropped when the
+content version it was filled under changes. The portfolio data defined in
+app.py only changes with a deploy, which starts with an empty cache anyway.
+"""
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from search_index import TOKEN_RE, tokenize
+
+# Words that change how a question is phrased but not what it asks
+FILLER_WORDS = {
+    'pradyumna', 'can', 'could', 'would', 'you', 'please', 'tell', 'give', 'list', 'know', 'like',
+    'want', 'i', 'him', 'have', 'had', 'been', 'done', 'all', 'there', 'was', 'were', 'your', 'my'
+}
+# Words folded into one, after plurals are
+SYNONYMS = {
+    'built': 'build', 'building': 'build', 'made': 'build', 'make': 'build', 'created': 'build',
+    'create': 'build', 'developed': 'build', 'develop': 'build',
+    'worked': 'work', 'working': 'work',
+    'studied': 'study', 'education': 'study', 'degree': 'study', 'university': 'study', 'college': 'study',
+    'reach': 'contact', 'email': 'contact', 'hire': 'contact', 'connect': 'contact',
+    'technologie': 'skill', 'tech': 'skill', 'tool': 'skill', 'stack': 'skill',
+    'job': 'experience', 'career': 'experience', 'employment': 'experience', 'role': 'experience',
+}
+# Words that do not change what a question is about, weighted down by the embedder
+LIGHT_WORDS = {'build', 'work', 'use', 'used', 'using', 'where', 'when', 'how', 'why', 'main', 'recent'}
+LIGHT_WEIGHT = 0.3
+# Words that refer back to earlier turns, so the answer depends on the conversation
+FOLLOW_UP_WORDS = {'it', 'its', 'that', 'this', 'those', 'these', 'them', 'they', 'one', 'more', 'else', 'also'}
+
+
+def normalize_question(question):
+    """Canonical form of a question (its distinct words, sorted), '' if nothing meaningful is left"""
+    words = set()
+    for token in tokenize(question):
+        if token in FILLER_WORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        words.add(SYNONYMS.get(token, token))
+    return ' '.join(sorted(words))
+
+
+class QuestionEmbedder:
+    """Feature-hashing embedder over the words of normalized questions, light words weighted down"""
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def embed(self, texts):
+        import numpy as np
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                h = zlib.crc32(word.encode('utf-8'))
+                weight = LIGHT_WEIGHT if word in LIGHT_WORDS else 1.0
+                matrix[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        return matrix
+
+
+def is_follow_up(question):
+    return not FOLLOW_UP_WORDS.isdisjoint(TOKEN_RE.findall(question.lower()))
+
+
+class SemanticCache:
+    """Answers keyed by question, looked up by similarity of the normalized questions"""
+
+    def __init__(self, embedder=None, maxsize=256, ttl=86400, threshold=0.9, name='chat_answers'):
+        self.embedder = embedder or QuestionEmbedder()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.name = name
+        self.version = None
+        self._entries = OrderedDict()  # normalized question -> (expires, vector, answer)
+        self._keys = []
+        self._matrix = None  # Rows of self._keys, rebuilt after the entries change
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.on_lookup = None  # Optional callback(name, hit), e.g. for metrics
+
+    def _embed(self, text):
+        import numpy as np
+        vector = self.embedder.embed([text])[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._keys, self._matrix = [], None
+            self.version = version
+
+    def get(self, question, version):
+        """Cached answer for ``question`` under content ``version``, or None"""
+        key = normalize_question(question)
+        if not key:
+            return None
+        vector = None
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            match, near = self._entries.get(key), False
+            if match is None and self._entries:
+                vector = self._embed(key)
+                if self._matrix is None:
+                    import numpy as np
+                    self._keys = list(self._entries)
+                    self._matrix = np.vstack([self._entries[k][1] for k in self._keys])
+                scores = self._matrix @ vector
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    key, near = self._keys[best], True
+                    match = self._entries[key]
+            if match is not None and match[0] <= now:
+                del self._entries[key]
+                self._matrix, match = None, None
+            if match is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.near_hits += near
+            else:
+                self.misses += 1
+        if self.on_lookup:
+            self.on_lookup(self.name, match is not None)
+        return match[2] if match is not None else None
+
+    def set(self, question, answer, version):
+        """Cache ``answer``, unless the content changed since ``version`` was read"""
+        key = normalize_question(question)
+        if not key:
+            return
+        vector = self._embed(key)
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, vector, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
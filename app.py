@@ -1,25 +1,83 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory
+import time
+IMPORT_STARTED = time.perf_counter()  # Before anything else, to measure the app's import time
+
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory, send_file, abort, Response, stream_with_context, make_response, g
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
-from werkzeug.utils import secure_filename
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.utils import secure_filename, safe_join
 from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
 from functools import wraps
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
+import click
+import base64
+import hashlib
+import hmac
+import re
+import threading
+from cache import TTLCache
+from search_index import SearchIndex
+from retrieval import VectorIndex, create_embedder, chunk_text, html_to_text
+from llm_gateway import create_gateway, LLMOverloadedError, LLMTimeoutError
+import fallbacks
+from admission import RateLimiter
+from metrics import Metrics
+from mail_outbox import MailOutbox
+from assets import AssetManifest, build_assets
+from images import ImageResizer
+from uploads import HashingRequest, store_upload
+from paper_ingest import PaperIngestor
+from site_export import SiteExporter, collect_files
+from static_files import StaticFiles, precompress
+from blog import FragmentCache, render_markdown, slugify
+from answer_cache import SemanticCache, is_follow_up
+from conversations import ConversationStore, format_history
+from enrichment import Enricher, extract_json, validate_project_tags, validate_skill_analysis, skill_analysis_prompt
+from content_store import open_content_store, SQLiteContentStore, POST_TYPE, PAPER_TYPE, page_key
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+# Prometheus metrics, aggregated across gunicorn workers (see gunicorn.conf.py)
+metrics = Metrics()
+
+# Configure Gemini API (every AI route goes through this shared gateway)
+llm = create_gateway()
+llm.on_call = metrics.llm_call
 
 # Initialize Flask app
 app = Flask(__name__)
+# Render's proxy appends the visitor's address to X-Forwarded-For; everything
+# before it is sent by the client and cannot be trusted. PROXY_COUNT is the
+# number of proxies in front of the app (0 when it is reached directly)
+PROXY_COUNT = int(os.getenv('PROXY_COUNT', '1'))
+if PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
 
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    metrics.request_started(g.metrics_endpoint)
+
+@app.after_request
+def record_request_metrics(response):
+    if 'metrics_started' in g:
+        elapsed = time.perf_counter() - g.metrics_started
+        metrics.request_finished(g.metrics_endpoint, request.method, response.status_code, elapsed)
+        if startup_times['first_request_seconds'] is None:
+            record_first_request(elapsed)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_started' in g:
+        metrics.request_closed(g.metrics_endpoint)
+
 # Production configuration
 if os.getenv('RENDER'):
     # Production settings for Render
@@ -29,6 +87,7 @@ if os.getenv('RENDER'):
     os.makedirs('static/papers', exist_ok=True)
     os.makedirs('static/images', exist_ok=True)
     os.makedirs('static/uploads', exist_ok=True)
+    os.makedirs('static/data', exist_ok=True)
 
 # Upload configuration
 if os.getenv('RENDER'):
@@ -37,12 +96,15 @@ if os.getenv('RENDER'):
     PAPERS_FOLDER = 'static/papers'
     IMAGES_FOLDER = 'static/images'
     BLOGS_FOLDER = 'static/blog'
+    # Private app data lives on the persistent disk but is never served
+    DATA_FOLDER = 'static/data'
 else:
     # Local development paths
     UPLOAD_FOLDER = 'docs/static/uploads'
     PAPERS_FOLDER = 'docs/static/papers'
     IMAGES_FOLDER = 'docs/static/images'
     BLOGS_FOLDER = 'docs/blog'
+    DATA_FOLDER = 'data'
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
@@ -50,9 +112,132 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 
 # Create upload directories if they don't exist
-for folder in [UPLOAD_FOLDER, PAPERS_FOLDER, IMAGES_FOLDER, BLOGS_FOLDER]:
+for folder in [UPLOAD_FOLDER, PAPERS_FOLDER, IMAGES_FOLDER, BLOGS_FOLDER, DATA_FOLDER]:
     os.makedirs(folder, exist_ok=True)
 
+# Compiled templates are kept on disk, so new workers load them instead of compiling
+JINJA_CACHE_FOLDER = os.path.join(DATA_FOLDER, 'jinja_cache')
+os.makedirs(JINJA_CACHE_FOLDER, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_FOLDER)
+
+# Uploads are streamed to disk and hashed while the request is parsed, then
+# stored as <sha256><ext> so identical files are only kept once (see uploads.py)
+HashingRequest.spool_folder = os.path.join(DATA_FOLDER, 'upload_spool')
+app.request_class = HashingRequest
+
+# Bundled, fingerprinted CSS/JS (built by `flask build-assets`, served from /assets/)
+DIST_FOLDER = os.path.join(app.root_path, 'dist')
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+asset_manifest = AssetManifest(DIST_FOLDER)
+
+# Static files are served with precompressed .br/.gz variants, Range support and
+# optionally handed to the front proxy (STATIC_OFFLOAD, see static_files.py)
+STATIC_VARIANTS_FOLDER = os.path.join(app.root_path, 'precompressed')
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', '86400'))
+STATIC_OFFLOAD = os.getenv('STATIC_OFFLOAD', '').lower()
+STATIC_OFFLOAD_PREFIX = os.getenv('STATIC_OFFLOAD_PREFIX', '/internal')
+static_files = StaticFiles(app.static_folder, variants_folder=STATIC_VARIANTS_FOLDER, max_age=STATIC_MAX_AGE,
+                           private=('data',), offload=STATIC_OFFLOAD, offload_prefix=f'{STATIC_OFFLOAD_PREFIX}/static')
+asset_files = StaticFiles(DIST_FOLDER, variants_folder=DIST_FOLDER, max_age=ASSET_MAX_AGE, immutable=True)
+# Papers are stored under their content hash, so they can be cached forever
+paper_files = StaticFiles(PAPERS_FOLDER, max_age=ASSET_MAX_AGE, immutable=True,
+                          offload=STATIC_OFFLOAD, offload_prefix=f'{STATIC_OFFLOAD_PREFIX}/papers')
+# Replaces Flask's handler for /static/, which would also serve the private data folder on Render
+app.view_functions['static'] = static_files.serve
+
+@app.template_global()
+def asset_urls(bundle):
+    """URLs for a bundle: the fingerprinted build if there is one, else its source files"""
+    return asset_manifest.urls(bundle,
+                               lambda path: url_for('serve_asset', filename=path),
+                               lambda path: url_for('static', filename=path))
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    # File names carry their content hash, so they can be cached forever
+    return asset_files.serve(filename)
+
+@app.route('/papers/<path:filename>')
+def serve_paper(filename):
+    """A technical paper's PDF, with Range support so viewers can load it page by page"""
+    return paper_files.serve(filename)
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Bundle, minify and fingerprint the CSS/JS used by the templates, then precompress static files"""
+    manifest = build_assets(app.static_folder, DIST_FOLDER)
+    for bundle, output in sorted(manifest.items()):
+        click.echo(f'{bundle} -> {output}')
+    written = precompress(DIST_FOLDER, DIST_FOLDER)
+    written += precompress(app.static_folder, STATIC_VARIANTS_FOLDER, skip=('data', 'uploads', 'papers'))
+    click.echo(f'Precompressed {written} files')
+
+# Responsive images: resized WebP/JPEG derivatives cached on disk (see images.py)
+IMAGE_MAX_AGE = 7 * 24 * 60 * 60
+IMAGE_PREGENERATE = os.getenv('IMAGE_PREGENERATE', '').lower() in ('1', 'true', 'yes')
+image_resizer = ImageResizer(os.path.join(DATA_FOLDER, 'image_cache'),
+                             max_bytes=int(os.getenv('IMAGE_CACHE_MAX_MB', '200')) * 1024 * 1024,
+                             workers=int(os.getenv('IMAGE_WORKERS', '2')))
+image_resizer.on_lookup = metrics.cache_lookup
+
+def find_image(filename):
+    """Path of an image in the bundled static images or the uploads folder"""
+    for folder in [os.path.join(app.static_folder, 'images'), IMAGES_FOLDER]:
+        path = safe_join(folder, filename)
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+@app.template_global()
+def image_url(filename, width=None):
+    if app.config.get('STATIC_EXPORT'):
+        # GitHub Pages cannot resize, the export links the original files
+        return url_for('static', filename=f'images/{filename}')
+    return url_for('serve_image', filename=filename, w=width)
+
+@app.template_global()
+def image_srcset(filename):
+    """srcset value listing the standard widths available for an image"""
+    source = find_image(filename)
+    if not source or app.config.get('STATIC_EXPORT'):
+        return ''
+    return ', '.join(f'{image_url(filename, width)} {width}w' for width in image_resizer.widths_for(source))
+
+@app.route('/img/<path:filename>')
+def serve_image(filename):
+    """Serve an image scaled to ?w= pixels wide, as WebP when the browser accepts it"""
+    source = find_image(filename)
+    if not source:
+        abort(404)
+    
+    width = request.args.get('w', type=int)
+    if not width or not image_resizer.widths_for(source):
+        return send_file(source, conditional=True, max_age=IMAGE_MAX_AGE)
+    
+    accepts_webp = 'image/webp' in request.headers.get('Accept', '')
+    try:
+        path, mimetype = image_resizer.derivative(source, width, accepts_webp)
+    except Exception as e:
+        # Pillow could read the header but not the image data
+        print(f"Could not resize {filename}: {str(e)}")
+        return send_file(source, conditional=True, max_age=IMAGE_MAX_AGE)
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=IMAGE_MAX_AGE)
+    response.vary.add('Accept')
+    return response
+
+# Content store for blog posts and papers ('sqlite' or the legacy 'json' file)
+CONTENT_STORE = os.getenv('CONTENT_STORE', 'sqlite')
+BLOG_DATA_FILE = os.path.join(BLOGS_FOLDER, 'blog_data.json')
+content_store = open_content_store(CONTENT_STORE, DATA_FOLDER, BLOG_DATA_FILE)
+
+# Blog post bodies rendered from Markdown, keyed on the hash of their source
+blog_fragments = FragmentCache(maxsize=int(os.getenv('BLOG_FRAGMENT_CACHE_SIZE', '256')))
+blog_fragments.on_lookup = metrics.cache_lookup
+
+# Text, page count and excerpt of uploaded papers, extracted in the background
+paper_ingestor = PaperIngestor(content_store, PAPERS_FOLDER, os.path.join(DATA_FOLDER, 'paper_text'),
+                               workers=int(os.getenv('PAPER_INGEST_WORKERS', '1')))
+
 # Define personal information for easier access
 personal_info = {
     "name": "Pradyumna S R",
@@ -104,6 +289,10 @@ projects = [
     }
 ]
 
+# Ensure project images exist or use placeholders
+for project in projects:
+    project.setdefault('image', 'placeholder.jpg')
+
 # Define experience for the timeline
 experiences = [
     {
@@ -149,42 +338,198 @@ education = [
 ]
 
 # Routes
+# Fully rendered pages, keyed on the template files and a hash of their inputs
+page_cache = TTLCache(maxsize=32, ttl=int(os.getenv('PAGE_CACHE_TTL', '86400')), name='pages')
+page_cache.on_lookup = metrics.cache_lookup
+
+def source_mtimes(template_names):
+    """mtimes of the templates and of this module, which holds the page data"""
+    paths = [os.path.join(app.root_path, app.template_folder, name) for name in template_names]
+    return tuple(os.stat(path).st_mtime_ns for path in paths + [os.path.abspath(__file__)])
+
+def render_cached_page(template_name, template_names, stored=False, **context):
+    """Render a page once per version of its inputs and answer conditional GETs
+
+    ``template_names`` lists the template and everything it extends or includes.
+    The ETag is a hash of the rendered body and Last-Modified is the newest
+    source mtime, so every worker produces the same validators. Pages showing a
+    ``stored`` record get no Last-Modified: the source mtimes do not change when
+    the record does, so only the ETag can tell.
+    """
+    mtimes = source_mtimes(template_names) + (asset_manifest.version(),)
+    data_hash = hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    key = (template_name, mtimes, data_hash)
+    page = page_cache.get(key)
+    if page is None:
+        body = render_template(template_name, **context)
+        page = {
+            'body': body,
+            'etag': hashlib.sha256(body.encode('utf-8')).hexdigest()[:32],
+            'last_modified': datetime.fromtimestamp(max(m for m in mtimes if m) / 1e9, timezone.utc)
+        }
+        page_cache.set(key, page)
+    
+    response = make_response(page['body'])
+    response.set_etag(page['etag'])
+    if not stored:
+        response.last_modified = page['last_modified']
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
-    # Ensure project images exist or use placeholders
-    for project in projects:
-        project['image'] = project.get('image', 'placeholder.jpg')
+    return render_cached_page('index.html', ('index.html', 'layout.html'),
+                              personal_info=personal_info,
+                              skills=skills,
+                              projects=projects,
+                              experiences=experiences,
+                              education=education)
+
+# Latency budget per AI feature in seconds. When it runs out, or the gateway's
+# circuit breaker is open, the route answers from fallbacks.py instead
+LLM_BUDGETS = {
+    'generate_bio': float(os.getenv('LLM_BUDGET_BIO', '4')),
+    'analyze_skills': float(os.getenv('LLM_BUDGET_SKILLS', '6')),
+    'generate_project_tags': float(os.getenv('LLM_BUDGET_TAGS', '6')),
+    'chatbot': float(os.getenv('LLM_BUDGET_CHATBOT', '10')),
+    'chatbot_stream': float(os.getenv('LLM_BUDGET_CHATBOT', '10')),
+}
+
+def budget_left(deadline):
+    return max(0.0, deadline - time.monotonic())
+
+def generate_or_fallback(prompt, route, fallback, parse=None, deadline=None):
+    """Return ``(text, used_fallback)``, calling ``fallback()`` if Gemini fails or runs over budget
+
+    ``parse`` turns the response into the returned value; if it raises, the
+    fallback is used as well. ``deadline`` (``time.monotonic()``) ends the
+    budget early when the request already spent part of it. ``LLMOverloadedError``
+    is not caught: a full gateway still answers 503 so clients back off
+    instead of retrying into it.
+    """
+    try:
+        timeout = LLM_BUDGETS[route] if deadline is None else budget_left(deadline)
+        if not timeout:
+            raise LLMTimeoutError(f"No budget left for '{route}'")
+        response = llm.generate(prompt, route=route, timeout=timeout)
+        return (parse(response) if parse else response), False
+    except LLMOverloadedError:
+        raise
+    except Exception as e:
+        print(f"Using fallback for {route}: {str(e)}")
+        return fallback(), True
+
+# Project tags and the skill analysis, generated in the background once per
+# change of their inputs and stored (see enrichment.py)
+enricher = Enricher(llm, os.path.join(DATA_FOLDER, 'enrichments'), projects,
+                    [skill for names in skills.values() for skill in names],
+                    batch_size=int(os.getenv('ENRICH_BATCH_SIZE', '8')))
+
+# Generated bios only depend on the visitor type, so they are cached
+KNOWN_VISITOR_TYPES = ['recruiter', 'peer developer', 'student', 'ai researcher', 'general']
+bio_cache = TTLCache(maxsize=int(os.getenv('BIO_CACHE_SIZE', '64')),
+                     ttl=int(os.getenv('BIO_CACHE_TTL', '86400')),
+                     name='bio')
+bio_cache.on_lookup = metrics.cache_lookup
+
+def normalize_visitor_type(visitor_type):
+    """Collapse case and whitespace so equivalent visitor types share a cache entry"""
+    normalized = ' '.join(str(visitor_type or '').lower().split())[:50]
+    return normalized or 'general'
+
+def get_bio(visitor_type):
+    """Return ``(bio, used_fallback)`` for a normalized visitor type, generating it on a cache miss"""
+    bio = bio_cache.get(visitor_type)
+    if bio is not None:
+        return bio, False
     
-    return render_template('index.html', 
-                           personal_info=personal_info,
-                           skills=skills,
-                           projects=projects,
-                           experiences=experiences,
-                           education=education)
+    # Use Gemini API to generate a tailored bio
+    prompt = f"""
+    Generate a professional, engaging bio for Pradyumna S R, tailored for a {visitor_type} visitor.
+    Include these details:
+    - Software Engineer with focus on AI and ML
+    - Experience in machine learning, data processing, and AI theory
+    - Values interdisciplinary collaboration and human-centric technology
+    - Keep it concise (150 words max) and professional with a futuristic tone
+    """
+    
+    bio, used_fallback = generate_or_fallback(
+        prompt, 'generate_bio', lambda: fallbacks.bio(personal_info, skills, visitor_type))
+    # Fallback bios are not cached, so the next visitor gets a generated one
+    if not used_fallback:
+        bio_cache.set(visitor_type, bio)
+    return bio, used_fallback
+
+def prewarm_bio_cache():
+    """Generate bios for the visitor types the frontend sends"""
+    for visitor_type in KNOWN_VISITOR_TYPES:
+        try:
+            get_bio(visitor_type)
+        except Exception as e:
+            print(f"Failed to prewarm bio for {visitor_type}: {str(e)}")
+
+# The cache is per process, so every worker prewarms its own (started from
+# start_background_workers, never in a preloading master)
+PREWARM_BIO_CACHE = os.getenv('PREWARM_BIO_CACHE', '').lower() in ('1', 'true', 'yes')
+bio_prewarm_state = {'pid': None}
+bio_prewarm_lock = threading.Lock()
+
+def start_bio_prewarm():
+    if not PREWARM_BIO_CACHE or bio_prewarm_state['pid'] == os.getpid():
+        return
+    with bio_prewarm_lock:
+        if bio_prewarm_state['pid'] != os.getpid():
+            bio_prewarm_state['pid'] = os.getpid()
+            threading.Thread(target=prewarm_bio_cache, name='bio-prewarm', daemon=True).start()
+
+# Admission control for the AI routes: a token bucket per client, on top of
+# the gateway's cap on LLM calls in flight, so a burst of AI requests cannot
+# occupy every worker thread and stall the pages
+ai_rate_limiter = RateLimiter(rate=float(os.getenv('AI_RATE_PER_MINUTE', '20')) / 60,
+                              burst=int(os.getenv('AI_RATE_BURST', '5')))
+# Search is answered locally and only sometimes re-ranked, so it gets more room
+search_rate_limiter = RateLimiter(rate=float(os.getenv('SEARCH_RATE_PER_MINUTE', '120')) / 60,
+                                  burst=int(os.getenv('SEARCH_RATE_BURST', '20')))
+
+def client_key():
+    # remote_addr is the address the trusted proxy saw (see ProxyFix above)
+    return request.remote_addr or 'unknown'
+
+def rate_limited(limiter):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            wait = limiter.acquire(client_key())
+            if wait:
+                response = jsonify({'success': False, 'error': 'Too many requests, please try again shortly'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(wait)
+                return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def overloaded_response(error):
+    response = jsonify({'success': False, 'error': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
 @app.route('/api/generate-bio', methods=['POST'])
+@rate_limited(ai_rate_limiter)
 def generate_bio():
     try:
         data = request.get_json()
-        visitor_type = data.get('visitor_type', 'general')
-        
-        # Use Gemini API to generate a tailored bio
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = f"""
-        Generate a professional, engaging bio for Pradyumna S R, tailored for a {visitor_type} visitor.
-        Include these details:
-        - Software Engineer with focus on AI and ML
-        - Experience in machine learning, data processing, and AI theory
-        - Values interdisciplinary collaboration and human-centric technology
-        - Keep it concise (150 words max) and professional with a futuristic tone
-        """
-        
-        response = model.generate_content(prompt)
+        visitor_type = normalize_visitor_type(data.get('visitor_type', 'general'))
+        bio, used_fallback = get_bio(visitor_type)
         
         return jsonify({
             "success": True,
-            "bio": response.text
+            "bio": bio,
+            "fallback": used_fallback
         })
+    except LLMOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({
             "success": False,
@@ -192,31 +537,33 @@ def generate_bio():
         }), 500
 
 @app.route('/api/analyze-skills', methods=['POST'])
+@rate_limited(ai_rate_limiter)
 def analyze_skills():
     try:
         data = request.get_json()
         skills_list = data.get('skills', [])
         
-        # Use Gemini API to suggest skill improvements
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = f"""
-        Based on these skills: {', '.join(skills_list)}
-        
-        Suggest:
-        1. Three emerging technologies or skills that would complement this skill set
-        2. One specific area where deeper specialization would be valuable
-        3. A brief explanation of why these suggestions are relevant in today's tech landscape
-        
-        Format as JSON with keys: "emerging_skills", "specialization", "explanation"
-        """
-        
-        response = model.generate_content(prompt)
+        # The portfolio's own skill set is analyzed ahead of time (see enrichment.py)
+        stored = enricher.skill_analysis(skills_list)
+        if stored is not None:
+            analysis, used_fallback = stored, False
+        else:
+            # Use Gemini API to suggest skill improvements
+            analysis, used_fallback = generate_or_fallback(
+                skill_analysis_prompt(skills_list), 'analyze_skills',
+                lambda: fallbacks.skill_analysis(skills_list),
+                parse=lambda response: validate_skill_analysis(extract_json(response)))
         
-        # Parse the response text as JSON and return
+        # "analysis" stays a JSON string for the frontend, "enrichment" is the parsed object
         return jsonify({
             "success": True,
-            "analysis": response.text
+            "analysis": json.dumps(analysis),
+            "enrichment": analysis,
+            "stored": stored is not None,
+            "fallback": used_fallback
         })
+    except LLMOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({
             "success": False,
@@ -224,14 +571,25 @@ def analyze_skills():
         }), 500
 
 @app.route('/api/generate-project-tags', methods=['POST'])
+@rate_limited(ai_rate_limiter)
 def generate_project_tags():
     try:
         data = request.get_json()
         project_title = data.get('title', '')
         project_description = data.get('description', '')
         
+        # Portfolio projects are tagged ahead of time (see enrichment.py)
+        stored = enricher.project_tags(project_title)
+        if stored is not None:
+            return jsonify({
+                "success": True,
+                "tags_data": json.dumps(stored),
+                "enrichment": stored,
+                "stored": True,
+                "fallback": False
+            })
+        
         # Use Gemini API to generate relevant tags
-        model = genai.GenerativeModel('gemini-pro')
         prompt = f"""
         Based on this project:
         Title: {project_title}
@@ -245,86 +603,356 @@ def generate_project_tags():
         Format response as JSON with keys: "tags", "applications", "difficulty"
         """
         
-        response = model.generate_content(prompt)
+        known_tools = [tool for category in skills.values() for tool in category]
+        tags, used_fallback = generate_or_fallback(
+            prompt, 'generate_project_tags',
+            lambda: fallbacks.project_tags(project_title, project_description, projects, known_tools),
+            parse=lambda response: validate_project_tags(extract_json(response)))
         
         return jsonify({
             "success": True,
-            "tags_data": response.text
+            "tags_data": json.dumps(tags),
+            "enrichment": tags,
+            "stored": False,
+            "fallback": used_fallback
         })
+    except LLMOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+# Chatbot grounding: retrieve the most relevant chunks of site content per question
+RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '4'))
+chat_index = VectorIndex(create_embedder(os.getenv('RETRIEVAL_EMBEDDER', 'hashing'), llm))
+chat_index.on_lookup = metrics.cache_lookup
+chat_index_state = {'version': None}
+chat_index_lock = threading.Lock()
+
+CHATBOT_INSTRUCTIONS = """
+You are an AI assistant for Pradyumna S R's portfolio website. 
+Answer questions about Pradyumna's skills, projects, experience, writing, or offer to connect visitors with him.
+Base your answers on the information below. Keep responses concise, informative, and professional.
+"""
+
+def profile_chunk():
+    info = personal_info
+    return {'source': 'profile', 'title': info['name'],
+            'text': f"{info['name']} is based in {info['location']}. {info['profile_summary']} "
+                    f"Contact: {info['email']}, LinkedIn {info['linkedin']}, GitHub {info['github']}."}
+
+def chat_retrieval_chunks():
+    """Chunks of everything the site contains, for grounding chatbot answers"""
+    chunks = [profile_chunk()]
+    for project in projects:
+        chunks.append({'source': 'project', 'title': project['title'],
+                       'text': f"Project: {project['title']}. {project['description']} Tools: {', '.join(project['tools'])}."})
+    for category, names in skills.items():
+        label = category.replace('_', ' ').capitalize()
+        chunks.append({'source': 'skills', 'title': label, 'text': f"Skills - {label}: {', '.join(names)}."})
+    for experience in experiences:
+        chunks.append({'source': 'experience', 'title': experience['title'],
+                       'text': f"Experience: {experience['title']} at {experience['company']}, {experience['location']} "
+                               f"({experience['duration']}). {' '.join(experience['responsibilities'])}"})
+    for entry in education:
+        focus = f" Focus: {entry['focus']}." if entry['focus'] else ''
+        chunks.append({'source': 'education', 'title': entry['degree'],
+                       'text': f"Education: {entry['degree']} at {entry['institution']} ({entry['duration']}).{focus} "
+                               f"Coursework: {', '.join(entry['coursework'])}."})
+    for post in content_store.list(POST_TYPE):
+        text = post.get('description', '')
+        html_path = os.path.join(BLOGS_FOLDER, f"{post.get('slug')}.html")
+        if 'content' in post:
+            text = html_to_text(render_markdown(post['content']))
+        elif os.path.exists(html_path):
+            with open(html_path, 'r', encoding='utf-8') as f:
+                text = html_to_text(f.read())
+        for piece in chunk_text(text):
+            chunks.append({'source': 'blog', 'title': post['title'], 'text': f"Blog post '{post['title']}': {piece}"})
+    for paper in content_store.list(PAPER_TYPE):
+        chunks.append({'source': 'paper', 'title': paper['title'],
+                       'text': f"Technical paper '{paper['title']}': {paper.get('description', '')}"})
+    return chunks
+
+def sync_chat_index(timeout=None):
+    """Rebuild the chatbot's retrieval index when posts or papers changed, embedding within ``timeout``"""
+    version = content_store.version()
+    if version == chat_index_state['version']:
+        return
+    with chat_index_lock:
+        if version != chat_index_state['version']:
+            try:
+                chat_index.build(chat_retrieval_chunks(), timeout=timeout)
+            except Exception as e:
+                # Keep the previous index; the next question tries again
+                print(f"Could not rebuild the chatbot index: {str(e)}")
+                return
+            chat_index_state['version'] = version
+
+# Multi-turn memory: each visitor's session points at a conversation whose
+# history is compacted to CHAT_TOKEN_BUDGET, so prompts stay the same size
+CHAT_MAX_MESSAGE_CHARS = 2000
+conversations = ConversationStore(os.path.join(DATA_FOLDER, 'conversations.db'),
+                                  max_conversations=int(os.getenv('CHAT_MAX_CONVERSATIONS', '1000')),
+                                  ttl=int(os.getenv('CHAT_IDLE_TTL', '1800')),
+                                  token_budget=int(os.getenv('CHAT_TOKEN_BUDGET', '600')))
+
+# Answers to questions asked before, possibly in other words; always embedded
+# locally, whatever RETRIEVAL_EMBEDDER is, so a lookup never costs a request
+chat_answer_cache = SemanticCache(maxsize=int(os.getenv('CHAT_CACHE_SIZE', '256')),
+                                  ttl=int(os.getenv('CHAT_CACHE_TTL', '86400')),
+                                  threshold=float(os.getenv('CHAT_CACHE_THRESHOLD', '0.9')))
+chat_answer_cache.on_lookup = metrics.cache_lookup
+
+def conversation_id():
+    """Id of the visitor's conversation, kept in the session cookie"""
+    if 'chat_id' not in session:
+        session['chat_id'] = uuid.uuid4().hex
+    return session['chat_id']
+
+def answer_cache_policy(user_message, chat_id):
+    """``(lookup, store)``: whether the answer cache may answer ``user_message``, and keep its answer
+
+    Only answers to prompts without conversation history are stored, so nothing
+    a visitor said reaches anyone else. Any question that does not refer back to
+    earlier turns may be answered from the cache.
+    """
+    summary, turns = conversations.get(chat_id)
+    fresh = not summary and not turns
+    return fresh or not is_follow_up(user_message), fresh
+
+def build_chatbot_prompt(user_message, chat_id, deadline):
+    """Prompt shared by the JSON and streaming chatbot endpoints, and the chunks it was grounded on
+
+    Embedding the index and the query counts against the chatbot's budget,
+    which ends at ``deadline``; what is left of it goes to the answer.
+    """
+    sync_chat_index(timeout=budget_left(deadline))
+    summary, turns = conversations.get(chat_id)
+    # Follow-up questions ("which tools did it use?") are retrieved together with the previous one
+    query = f"{turns[-1]['q']} {user_message}" if turns else user_message
+    profile = profile_chunk()
+    try:
+        hits = chat_index.search(query, k=RETRIEVAL_TOP_K, min_score=0.05, timeout=budget_left(deadline))
+    except Exception as e:
+        print(f"Chatbot retrieval failed, answering from the profile only: {str(e)}")
+        hits = []
+    relevant = [chunk for _, chunk in hits if chunk['text'] != profile['text']]
+    context = '\n'.join(f"- {chunk['text']}" for chunk in [profile] + relevant)
+    history = format_history(summary, turns)
+    if history:
+        context = f"{context}\n\nConversation so far:\n{history}"
+    return f"{CHATBOT_INSTRUCTIONS}\nAbout Pradyumna:\n{context}\n\nUser: {user_message}\nResponse:", relevant
+
 @app.route('/api/chatbot', methods=['POST'])
+@rate_limited(ai_rate_limiter)
 def chatbot():
+    deadline = time.monotonic() + LLM_BUDGETS['chatbot']
     try:
         data = request.get_json()
-        user_message = data.get('message', '')
+        user_message = data.get('message', '')[:CHAT_MAX_MESSAGE_CHARS]
+        chat_id = conversation_id()
+        version = content_store.version()
+        lookup, store = answer_cache_policy(user_message, chat_id)
+        cached = chat_answer_cache.get(user_message, version) if lookup else None
+        if cached is not None:
+            conversations.append(chat_id, user_message, cached)
+            return jsonify({
+                "success": True,
+                "response": cached,
+                "fallback": False,
+                "cached": True
+            })
         
         # Use Gemini API for the chatbot responses
-        model = genai.GenerativeModel('gemini-pro')
-        
-        # Context about Pradyumna for the chatbot
-        context = """
-        You are an AI assistant for Pradyumna S R's portfolio website. 
-        About Pradyumna:
-        - Software Engineer specialized in AI, ML, and intelligent systems
-        - Experience with Python, TensorFlow, PyTorch, Computer Vision, NLP, and NeuroSymbolic AI
-        - Projects include violence detection in videos, deepfake detection, aerial object recognition, and medical image classification
-        - Values collaboration, continuous learning, and human-centric technology
-        - Located in Berlin, Germany
-        
-        Answer questions about Pradyumna's skills, projects, experience, or offer to connect visitors with him.
-        Keep responses concise, informative, and professional.
-        """
-        
-        prompt = f"{context}\n\nUser: {user_message}\nResponse:"
-        response = model.generate_content(prompt)
+        prompt, relevant = build_chatbot_prompt(user_message, chat_id, deadline)
+        response, used_fallback = generate_or_fallback(
+            prompt, 'chatbot', lambda: fallbacks.chat_answer(relevant), deadline=deadline)
+        conversations.append(chat_id, user_message, response)
+        if store and not used_fallback:
+            chat_answer_cache.set(user_message, response, version)
         
         return jsonify({
             "success": True,
-            "response": response.text
+            "response": response,
+            "fallback": used_fallback,
+            "cached": False
         })
+    except LLMOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+def sse_event(data, event=None):
+    """Format one Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+@app.route('/api/chatbot/stream', methods=['POST'])
+@rate_limited(ai_rate_limiter)
+def chatbot_stream():
+    """Streaming variant of the chatbot that sends response chunks as Server-Sent Events"""
+    deadline = time.monotonic() + LLM_BUDGETS['chatbot_stream']
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')[:CHAT_MAX_MESSAGE_CHARS]
+    chat_id = conversation_id()
+    version = content_store.version()
+    lookup, store = answer_cache_policy(user_message, chat_id)
+    cached = chat_answer_cache.get(user_message, version) if lookup else None
+    if cached is not None:
+        conversations.append(chat_id, user_message, cached)
+        return Response(sse_event({"text": cached, "cached": True}) + sse_event({}, event='done'),
+                        mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    relevant = []
+    try:
+        prompt, relevant = build_chatbot_prompt(user_message, chat_id, deadline)
+        timeout = budget_left(deadline)
+        if not timeout:
+            raise LLMTimeoutError("No budget left for 'chatbot_stream'")
+        chunks = llm.stream(prompt, route='chatbot_stream', timeout=timeout)
+    except LLMOverloadedError as e:
+        return overloaded_response(e)
+    except Exception as e:
+        print(f"Using fallback for chatbot_stream: {str(e)}")
+        chunks = None
+    
+    def events():
+        if chunks is None:
+            answer = fallbacks.chat_answer(relevant)
+            conversations.append(chat_id, user_message, answer)
+            yield sse_event({"text": answer, "fallback": True})
+            yield sse_event({}, event='done')
+            return
+        sent = []
+        try:
+            for chunk in chunks:
+                sent.append(chunk)
+                yield sse_event({"text": chunk})
+            conversations.append(chat_id, user_message, ''.join(sent))
+            if store:
+                chat_answer_cache.set(user_message, ''.join(sent), version)
+            yield sse_event({}, event='done')
+        except Exception as e:
+            if sent:
+                yield sse_event({"error": str(e)}, event='error')
+                return
+            # Nothing was streamed yet, so the fallback can still take its place
+            print(f"Using fallback for chatbot_stream: {str(e)}")
+            answer = fallbacks.chat_answer(relevant)
+            conversations.append(chat_id, user_message, answer)
+            yield sse_event({"text": answer, "fallback": True})
+            yield sse_event({}, event='done')
+    
+    return Response(stream_with_context(events()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Site search: BM25 over the portfolio data plus posts and papers
+search_index = SearchIndex()
+search_state = {'version': None, 'documents': {}}
+search_lock = threading.Lock()
+SEARCH_RERANK_THRESHOLD = float(os.getenv('SEARCH_RERANK_THRESHOLD', '0'))
+PAPER_SEARCH_CHARS = 20000  # How much of a paper's extracted text is indexed
+
+def portfolio_search_documents():
+    """Yield (doc_id, text, payload) for the portfolio data defined in this module"""
+    for i, project in enumerate(projects):
+        text = ' '.join([project['title'], project['description']] + project['tools'])
+        yield f'project:{i}', text, {'section': 'project', 'title': project['title'], 'item': project}
+    for category, names in skills.items():
+        for name in names:
+            item = {'name': name, 'category': category}
+            yield f'skill:{name}', f"{name} {category.replace('_', ' ')}", {'section': 'skill', 'title': name, 'item': item}
+    for i, experience in enumerate(experiences):
+        text = ' '.join([experience['title'], experience['company'], experience['location'],
+                         experience['duration']] + experience['responsibilities'])
+        title = f"{experience['title']} at {experience['company']}"
+        yield f'experience:{i}', text, {'section': 'experience', 'title': title, 'item': experience}
+    for i, entry in enumerate(education):
+        text = ' '.join([entry['institution'], entry['degree'], entry['duration'], entry['focus']] + entry['coursework'])
+        yield f'education:{i}', text, {'section': 'education', 'title': entry['degree'], 'item': entry}
+
+def content_search_document(record):
+    """Return (doc_id, text, payload) for a blog post or paper record"""
+    fields = ['id', 'title', 'description', 'slug', 'filename', 'created_date', 'upload_date']
+    item = {key: record[key] for key in fields if key in record}
+    section = 'blog' if record['type'] == POST_TYPE else 'paper'
+    text = ' '.join([record.get('title', ''), record.get('description', ''), record.get('content', '')])
+    if section == 'paper':
+        text = f"{text} {paper_ingestor.text(record)[:PAPER_SEARCH_CHARS]}"
+    return f"{section}:{record['id']}", text, {'section': section, 'title': record.get('title', ''), 'item': item}
+
+def sync_search_index():
+    """Re-index only the posts and papers that changed since the last sync"""
+    version = content_store.version()
+    if version == search_state['version']:
+        return
+    with search_lock:
+        if version == search_state['version']:
+            return
+        indexed = search_state['documents']
+        current = {}
+        for record in content_store.list():
+            doc_id, text, payload = content_search_document(record)
+            current[doc_id] = text
+            if indexed.get(doc_id) != text:
+                search_index.add(doc_id, text, payload)
+        for doc_id in set(indexed) - set(current):
+            search_index.remove(doc_id)
+        search_state.update(version=version, documents=current)
+
+def rerank_search_results(query, results, limit):
+    """Let Gemini order the candidates when the local ranking is not confident"""
+    candidates = results or [dict(search_index.payload(doc_id), score=0.0)
+                             for doc_id in search_index.doc_ids()][:50]
+    listing = '\n'.join(f"{i}. [{c['section']}] {c['title']}" for i, c in enumerate(candidates))
+    prompt = f"""
+    Search query: "{query}"
+    
+    Candidates from a portfolio website:
+    {listing}
+    
+    Return only a JSON array with the numbers of the candidates relevant to the query, most relevant first.
+    """
+    try:
+        response = llm.generate(prompt, route='search_rerank', timeout=5)
+        match = re.search(r'\[[\d\s,]*\]', response)
+        order = json.loads(match.group(0)) if match else []
+        ranked = [candidates[i] for i in dict.fromkeys(order) if isinstance(i, int) and 0 <= i < len(candidates)]
+    except Exception as e:
+        print(f"Search re-ranking failed: {str(e)}")
+        return results, False
+    return ranked[:limit], True
+
+for doc_id, text, payload in portfolio_search_documents():
+    search_index.add(doc_id, text, payload)
+sync_search_index()
+
 @app.route('/api/search', methods=['POST'])
+@rate_limited(search_rate_limiter)
 def search():
     try:
         data = request.get_json()
         query = data.get('query', '')
+        limit = max(1, min(int(data.get('limit', 10)), 50))
         
-        # Use Gemini API to search content
-        model = genai.GenerativeModel('gemini-pro')
+        sync_search_index()
+        results = [dict(payload, score=score) for score, payload in search_index.search(query, limit)]
         
-        # Context about the portfolio content
-        context = """
-        Portfolio content includes:
-        - Projects: Real-Life Violence Detection, OSINT for Digital Deception, Hybrid AI for Aerial Object Recognition, Pretrained CNN for X-ray Classification
-        - Skills: Python, R, SWI-Prolog, TensorFlow, PyTorch, OpenCV, Docker, Camunda, YOLO, MLflow, Computer Vision, NLP, NeuroSymbolic AI, Transfer Learning
-        - Experience: Software Engineer at Profinch Solutions (2020-2022)
-        - Education: Master's in Computer Science (Big Data and AI), Bachelor's in Electronics and Communication
-        """
-        
-        prompt = f"""
-        {context}
-        
-        Based on the search query: "{query}"
-        
-        Return the most relevant content from the portfolio.
-        Format as JSON with keys: "section" (project/skill/experience/education), "items" (array of matching items), "relevance_score" (1-10)
-        """
-        
-        response = model.generate_content(prompt)
+        # Ask Gemini only when the local ranking has nothing convincing
+        reranked = False
+        if SEARCH_RERANK_THRESHOLD and query.strip() and (not results or results[0]['score'] < SEARCH_RERANK_THRESHOLD):
+            results, reranked = rerank_search_results(query, results, limit)
         
         return jsonify({
             "success": True,
-            "results": response.text
+            "results": results,
+            "reranked": reranked
         })
     except Exception as e:
         return jsonify({
@@ -332,6 +960,30 @@ def search():
             "error": str(e)
         }), 500
 
+# Contact form emails are spooled to disk and delivered by a background thread
+contact_outbox = MailOutbox(
+    os.path.join(DATA_FOLDER, 'outbox'),
+    smtp_server=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+    smtp_port=int(os.getenv("SMTP_PORT", "587")),
+    sender_email=os.getenv("SENDER_EMAIL"),  # Your email for sending
+    sender_password=os.getenv("SENDER_PASSWORD"),  # App password
+    recipient_email=personal_info["email"],  # Your personal email to receive messages
+    starttls=os.getenv("SMTP_STARTTLS", "1").lower() not in ('0', 'false', 'no'),
+    digest_seconds=int(os.getenv("CONTACT_DIGEST_SECONDS", "0"))
+)
+contact_outbox.on_send = metrics.smtp_send
+
+@app.before_request
+def start_background_workers():
+    # Threads do not survive a fork, so each worker starts its own on first request.
+    # Tests and the static export render pages without serving anyone
+    if app.testing or app.config.get('STATIC_EXPORT'):
+        return
+    contact_outbox.start()
+    paper_ingestor.start()
+    enricher.start()
+    start_bio_prewarm()
+
 @app.route('/api/contact', methods=['POST'])
 def handle_contact():
     try:
@@ -347,8 +999,10 @@ def handle_contact():
         email = data['email']
         message = data['message']
         
-        # Send email notification to your personal email
-        send_contact_email(name, email, message)
+        # Queue the email notification to your personal email
+        if not contact_outbox.configured:
+            print("Email credentials not configured, message kept in the outbox")
+        contact_outbox.enqueue(name, email, message)
         
         return jsonify({
             "success": True,
@@ -362,62 +1016,6 @@ def handle_contact():
             "error": "Failed to process contact form"
         }), 500
 
-def send_contact_email(name, email, message):
-    """Send email notification when someone submits the contact form"""
-    try:
-        import smtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
-        
-        # Get email credentials from environment variables
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        sender_email = os.getenv("SENDER_EMAIL")  # Your email for sending
-        sender_password = os.getenv("SENDER_PASSWORD")  # App password
-        recipient_email = personal_info["email"]  # Your personal email to receive messages
-        
-        if not sender_email or not sender_password:
-            print("Email credentials not configured")
-            return False
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = f"New Contact Form Submission from {name}"
-        
-        # Email body
-        body = f"""
-        You have received a new message from your portfolio website!
-        
-        Name: {name}
-        Email: {email}
-        
-        Message:
-        {message}
-        
-        ---
-        This message was sent from your portfolio contact form.
-        Reply directly to {email} to respond to the sender.
-        """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        text = msg.as_string()
-        server.sendmail(sender_email, recipient_email, text)
-        server.quit()
-        
-        print(f"Contact email sent successfully to {recipient_email}")
-        return True
-        
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
-        return False
-
 # Authentication system
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -430,19 +1028,50 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def load_blog_data():
-    """Load blog posts from JSON file"""
-    blog_file = os.path.join(BLOGS_FOLDER, 'blog_data.json')
-    if os.path.exists(blog_file):
-        with open(blog_file, 'r') as f:
-            return json.load(f)
-    return {'posts': [], 'papers': []}
+@app.before_request
+def block_private_data():
+    # DATA_FOLDER sits under static/ on Render, keep it out of the static route
+    if DATA_FOLDER.startswith('static/') and request.path.startswith('/' + DATA_FOLDER + '/'):
+        abort(404)
+
+@app.cli.command('import-blog-data')
+@click.argument('path', default=BLOG_DATA_FILE)
+def import_blog_data_command(path):
+    """Import posts and papers from a blog_data.json file into the content store"""
+    if not isinstance(content_store, SQLiteContentStore):
+        click.echo('The json content store reads blog_data.json directly, nothing to import')
+        return
+    with open(path, 'r') as f:
+        imported = content_store.import_blog_data(json.load(f))
+    content_store.set_meta('imported_from', path)
+    click.echo(f'Imported {imported} new records from {path}')
 
-def save_blog_data(data):
-    """Save blog posts to JSON file"""
-    blog_file = os.path.join(BLOGS_FOLDER, 'blog_data.json')
-    with open(blog_file, 'w') as f:
-        json.dump(data, f, indent=2)
+@app.cli.command('export-site')
+@click.option('--out', default='docs', show_default=True, help='Folder published by GitHub Pages')
+@click.option('--base-path', default=lambda: os.getenv('PAGES_BASE_PATH', '/Portfolio'),
+              help='URL path the site is published under')
+@click.option('--workers', default=4, show_default=True, help='Pages rendered in parallel')
+def export_site_command(out, base_path, workers):
+    """Render the site into a static folder, rewriting only files that changed"""
+    app.config['STATIC_EXPORT'] = True
+    pages = [('/', 'index.html')]
+    for post in content_store.list(POST_TYPE):
+        legacy_html = os.path.join(BLOGS_FOLDER, f"{post.get('slug')}.html")
+        if post.get('slug') and ('content' in post or os.path.exists(legacy_html)):
+            pages.append((f"/blog/{post['slug']}.html", f"blog/{post['slug']}.html"))
+    files = (collect_files(app.static_folder, 'static', out, skip=('data', 'blog', 'papers', 'uploads'))
+             + collect_files(IMAGES_FOLDER, 'static/images', out)
+             + collect_files(PAPERS_FOLDER, 'static/papers', out)
+             + [(source, rel_path) for source, rel_path in collect_files(DIST_FOLDER, 'assets', out)
+                if rel_path != 'assets/manifest.json'])
+    
+    result = SiteExporter(app, out, base_path=base_path, workers=workers).export(pages, files)
+    for rel_path in result['written']:
+        click.echo(f'wrote {rel_path}')
+    for rel_path in result['removed']:
+        click.echo(f'removed {rel_path}')
+    click.echo(f"{len(result['written'])} written, {len(result['unchanged'])} unchanged, "
+               f"{len(result['removed'])} removed")
 
 # Admin login route
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -476,10 +1105,9 @@ def admin_logout():
 @app.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
-    blog_data = load_blog_data()
     return render_template('admin_dashboard.html', 
-                          posts=blog_data.get('posts', []),
-                          papers=blog_data.get('papers', []))
+                          posts=content_store.list(POST_TYPE),
+                          papers=content_store.list(PAPER_TYPE))
 
 # Upload paper route
 @app.route('/api/upload_paper', methods=['POST'])
@@ -497,32 +1125,30 @@ def upload_paper():
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
         if file and file.filename.lower().endswith('.pdf'):
-            filename = secure_filename(file.filename)
-            # Add timestamp to avoid conflicts
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{timestamp}_{filename}"
-            
-            file_path = os.path.join(PAPERS_FOLDER, filename)
-            file.save(file_path)
+            original_filename = secure_filename(file.filename)
+            filename, digest, created = store_upload(file, PAPERS_FOLDER, '.pdf')
+            metrics.upload('paper', request.content_length or 0)
             
-            # Save paper info to blog data
-            blog_data = load_blog_data()
+            # Save paper info to the content store
             paper_info = {
                 'id': str(uuid.uuid4()),
-                'title': title or filename.replace('.pdf', ''),
+                'title': title or original_filename.replace('.pdf', ''),
                 'description': description,
                 'filename': filename,
+                'original_filename': original_filename,
+                'sha256': digest,
                 'upload_date': datetime.now().isoformat(),
-                'type': 'paper'
+                'type': PAPER_TYPE
             }
             
-            blog_data.setdefault('papers', []).append(paper_info)
-            save_blog_data(blog_data)
+            content_store.insert(paper_info)
+            paper_ingestor.wake()
             
             return jsonify({
                 'success': True, 
                 'message': 'Paper uploaded successfully',
-                'paper': paper_info
+                'paper': paper_info,
+                'duplicate': not created
             })
         else:
             return jsonify({'success': False, 'error': 'Only PDF files are allowed'}), 400
@@ -544,19 +1170,24 @@ def upload_image():
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add timestamp to avoid conflicts
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            name, ext = os.path.splitext(filename)
-            filename = f"{timestamp}_{name}{ext}"
-            
+            ext = os.path.splitext(secure_filename(file.filename))[1]
+            filename, digest, created = store_upload(file, IMAGES_FOLDER, ext)
+            metrics.upload('image', request.content_length or 0)
             file_path = os.path.join(IMAGES_FOLDER, filename)
-            file.save(file_path)
+            
+            # Render the standard sizes in the background so first views are fast
+            if IMAGE_PREGENERATE and created:
+                try:
+                    image_resizer.pregenerate(file_path)
+                except Exception as e:
+                    print(f"Failed to pregenerate image sizes: {str(e)}")
             
             return jsonify({
                 'success': True, 
                 'message': 'Image uploaded successfully',
                 'filename': filename,
+                'sha256': digest,
+                'duplicate': not created,
                 'path': f'static/images/{filename}'
             })
         else:
@@ -579,127 +1210,215 @@ def create_blog():
         if not all([title, description, content]):
             return jsonify({'success': False, 'error': 'Missing required fields'}), 400
         
-        # Generate blog post
-        import re
-        slug = re.sub(r'[^a-z0-9-]', '', title.lower().replace(' ', '-'))
+        # Posts are stored as Markdown and rendered by the /blog/<slug> route
         post_id = str(uuid.uuid4())
-        
-        # Create HTML file
-        blog_html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - Pradyumna S R</title>
-    <link rel="stylesheet" href="../static/css/style.css">
-    <link rel="stylesheet" href="../static/css/blog-enhanced.css">
-</head>
-<body class="theme-dark">
-    <article style="max-width: 800px; margin: 0 auto; padding: 40px 20px;">
-        <header style="margin-bottom: 40px; text-align: center;">
-            <h1 style="color: var(--text-primary); margin-bottom: 15px;">{title}</h1>
-            <div style="color: var(--text-secondary); margin-bottom: 20px;">
-                Published on {datetime.now().strftime('%B %d, %Y')}
-            </div>
-            <a href="../index.html" style="color: var(--accent-primary); text-decoration: none;">
-                ← Back to Portfolio
-            </a>
-        </header>
-        
-        <div style="color: var(--text-primary); line-height: 1.8; font-size: 1.1rem;">
-            {''.join(f'<p>{p.strip()}</p>' for p in content.split('\n') if p.strip())}
-        </div>
-        
-        <footer style="margin-top: 60px; text-align: center; padding-top: 30px; border-top: 1px solid var(--card-border);">
-            <p style="color: var(--text-secondary);">
-                Thanks for reading! Connect with me on 
-                <a href="https://linkedin.com/in/pradyumnasr" style="color: var(--accent-primary);">LinkedIn</a>
-            </p>
-        </footer>
-    </article>
-</body>
-</html>"""
-        
-        # Save HTML file
-        blog_file_path = os.path.join(BLOGS_FOLDER, f'{slug}.html')
-        with open(blog_file_path, 'w', encoding='utf-8') as f:
-            f.write(blog_html)
+        base_slug = slugify(title)
+        if not base_slug.strip('-'):
+            # Titles without ASCII letters or digits (e.g. "日本語") have no slug of their own
+            base_slug = f'post-{post_id[:8]}'
+        slug = base_slug
+        suffix = 2
+        while content_store.get_by_slug(slug):
+            slug = f'{base_slug}-{suffix}'
+            suffix += 1
         
         # Save blog info
-        blog_data = load_blog_data()
         post_info = {
             'id': post_id,
             'title': title,
             'description': description,
             'slug': slug,
             'image': image,
+            'content': content,
+            'content_format': 'markdown',
             'created_date': datetime.now().isoformat(),
-            'type': 'blog'
+            'type': POST_TYPE
         }
         
-        blog_data.setdefault('posts', []).append(post_info)
-        save_blog_data(blog_data)
+        content_store.insert(post_info)
         
         return jsonify({
             'success': True, 
             'message': 'Blog post created successfully',
-            'post': post_info
+            'post': post_info,
+            'url': url_for('blog_post', slug=slug)
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def remove_paper_file(record):
+    """Delete a removed paper's PDF unless another paper shares the same content"""
+    filename = record.get('filename')
+    if not filename or any(paper.get('filename') == filename for paper in content_store.list(PAPER_TYPE)):
+        return
+    pdf_path = os.path.join(PAPERS_FOLDER, filename)
+    if os.path.exists(pdf_path):
+        os.remove(pdf_path)
+    if record.get('sha256'):
+        paper_ingestor.forget(record['sha256'])
+
+@app.route('/blog/<slug>.html')
+@app.route('/blog/<slug>')
+def blog_post(slug):
+    """A blog post rendered from its Markdown source through templates/blog_post.html
+
+    The ``.html`` URL is the one the static export writes for GitHub Pages.
+    """
+    post = content_store.get_by_slug(slug)
+    if not post or post.get('type') != POST_TYPE:
+        abort(404)
+    if 'content' not in post:
+        # Posts created before Markdown support only exist as generated HTML
+        return send_from_directory(BLOGS_FOLDER, f'{slug}.html')
+    try:
+        published = datetime.fromisoformat(post['created_date']).strftime('%B %d, %Y')
+    except (KeyError, ValueError):
+        published = ''
+    return render_cached_page('blog_post.html', ('blog_post.html', 'layout.html'), stored=True,
+                              personal_info=personal_info,
+                              post=post,
+                              published=published,
+                              body=blog_fragments.render(post['content']))
+
+POSTS_PAGE_SIZE = 10
+POSTS_MAX_PAGE_SIZE = 50
+
+def encode_cursor(record):
+    return base64.urlsafe_b64encode(json.dumps(page_key(record)).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    date, content_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    return str(date), str(content_id)
+
 # Get blog posts for frontend
 @app.route('/api/get_posts')
 def get_posts():
-    blog_data = load_blog_data()
-    return jsonify(blog_data)
+    """One page of posts and papers, newest first
+
+    Query parameters: ``limit``, ``cursor`` (``next_cursor`` of the previous
+    page), ``type`` (blog or paper) and ``fields`` (comma separated).
+    """
+    # The response only depends on the content version and the query, so a
+    # matching If-None-Match is answered before touching the store
+    etag = hashlib.sha256(f'{content_store.version()}?{request.query_string.decode()}'.encode('utf-8')).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', POSTS_PAGE_SIZE)), POSTS_MAX_PAGE_SIZE))
+        content_type = request.args.get('type') or None
+        if content_type not in (None, POST_TYPE, PAPER_TYPE):
+            return jsonify({'success': False, 'error': f'Unknown type: {content_type}'}), 400
+        cursor = request.args.get('cursor')
+        before = decode_cursor(cursor) if cursor else None
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Invalid limit or cursor'}), 400
+    
+    # Fetch one extra record to know whether there is a next page
+    records = content_store.page(content_type, limit + 1, before)
+    has_more = len(records) > limit
+    records = records[:limit]
+    fields = [field for field in request.args.get('fields', '').split(',') if field]
+    if fields:
+        items = [{key: record[key] for key in ['id', 'type'] + fields if key in record} for record in records]
+    else:
+        # Post sources can be long, they are only sent when asked for by name
+        items = [{key: value for key, value in record.items() if key != 'content'} for record in records]
+    
+    response = jsonify({
+        'success': True,
+        'items': items,
+        'next_cursor': encode_cursor(records[-1]) if has_more else None
+    })
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
 
 # Delete post/paper
 @app.route('/api/delete_content/<content_id>', methods=['DELETE'])
 @login_required
 def delete_content(content_id):
     try:
-        blog_data = load_blog_data()
-        
-        # Find and remove from posts
-        blog_data['posts'] = [p for p in blog_data.get('posts', []) if p['id'] != content_id]
-        
-        # Find and remove from papers
-        for paper in blog_data.get('papers', []):
-            if paper['id'] == content_id:
-                # Delete PDF file
-                pdf_path = os.path.join(PAPERS_FOLDER, paper['filename'])
-                if os.path.exists(pdf_path):
-                    os.remove(pdf_path)
-                break
-        
-        blog_data['papers'] = [p for p in blog_data.get('papers', []) if p['id'] != content_id]
+        record = content_store.delete(content_id)
         
-        save_blog_data(blog_data)
+        if record and record.get('type') == PAPER_TYPE:
+            remove_paper_file(record)
         
         return jsonify({'success': True, 'message': 'Content deleted successfully'})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text format; needs an admin session or the METRICS_TOKEN bearer token"""
+    token = os.getenv('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if 'logged_in' not in session and not (token and hmac.compare_digest(authorization, f'Bearer {token}')):
+        abort(401)
+    if not metrics.enabled:
+        return jsonify({'success': False, 'error': 'prometheus_client is not installed'}), 503
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@app.route('/admin/api/caches')
+@login_required
+def api_cache_stats():
+    """Hit/miss counters for the in-process caches of this worker"""
+    return jsonify([bio_cache.stats(), page_cache.stats(), blog_fragments.stats(), image_resizer.stats(),
+                    chat_answer_cache.stats()])
+
+@app.route('/admin/api/llm')
+@login_required
+def api_llm_stats():
+    """Per-route call counts, latency percentiles and circuit breaker state for the LLM gateway"""
+    return jsonify({'routes': llm.stats(), 'circuit': llm.circuit()})
+
+@app.route('/admin/api/conversations')
+@login_required
+def api_conversation_stats():
+    """Size of the chatbot conversation store"""
+    return jsonify(conversations.stats())
+
+@app.route('/admin/api/enrichment')
+@login_required
+def api_enrichment_stats():
+    """Stored project and skill enrichments of this worker"""
+    return jsonify(enricher.stats())
+
+@app.route('/admin/api/admission')
+@login_required
+def api_admission_stats():
+    """Rate limiter counters for the AI routes of this worker"""
+    return jsonify({'ai': ai_rate_limiter.stats(), 'search': search_rate_limiter.stats()})
+
+@app.route('/admin/api/ingest')
+@login_required
+def api_ingest_stats():
+    """Backlog and counters of the paper ingest worker"""
+    return jsonify(paper_ingestor.stats())
+
 # API Routes for Content Management
 @app.route('/admin/api/blogs')
 @login_required
 def api_get_blogs():
     """Get all blog posts for admin dashboard"""
     try:
-        blog_data = load_blog_data()
-        blogs = blog_data.get('blogs', [])
+        blogs = content_store.list(POST_TYPE)
         
         # Format blogs for display
         formatted_blogs = []
         for blog in blogs:
+            text = blog.get('content') or blog.get('description', '')
             formatted_blogs.append({
                 'id': blog['id'],
                 'title': blog['title'],
-                'excerpt': blog['content'][:150] + '...' if len(blog['content']) > 150 else blog['content'],
-                'date': blog['date'],
+                'excerpt': text[:150] + '...' if len(text) > 150 else text,
+                'date': blog.get('date') or blog.get('created_date', ''),
                 'tags': blog.get('tags', [])
             })
         
@@ -712,8 +1431,7 @@ def api_get_blogs():
 def api_get_papers():
     """Get all technical papers for admin dashboard"""
     try:
-        blog_data = load_blog_data()
-        papers = blog_data.get('papers', [])
+        papers = content_store.list(PAPER_TYPE)
         
         # Format papers for display
         formatted_papers = []
@@ -723,8 +1441,11 @@ def api_get_papers():
                 'title': paper['title'],
                 'description': paper['description'],
                 'upload_date': paper['upload_date'],
-                'file_url': f'/static/papers/{paper["filename"]}',
-                'filename': paper['filename']
+                'file_url': url_for('serve_paper', filename=paper['filename']),
+                'filename': paper['filename'],
+                'page_count': paper.get('page_count'),
+                'excerpt': paper.get('excerpt', ''),
+                'ingest_status': paper.get('ingest_status', 'pending')
             })
         
         return jsonify(formatted_papers)
@@ -736,12 +1457,8 @@ def api_get_papers():
 def api_delete_blog(blog_id):
     """Delete a specific blog post"""
     try:
-        blog_data = load_blog_data()
-        
         # Find and remove the blog post
-        blog_data['blogs'] = [blog for blog in blog_data.get('blogs', []) if blog['id'] != blog_id]
-        
-        save_blog_data(blog_data)
+        content_store.delete(blog_id, POST_TYPE)
         
         return jsonify({'success': True, 'message': 'Blog post deleted successfully'})
         
@@ -753,30 +1470,51 @@ def api_delete_blog(blog_id):
 def api_delete_paper(paper_id):
     """Delete a specific technical paper"""
     try:
-        blog_data = load_blog_data()
-        
-        # Find the paper to delete its file
-        paper_to_delete = None
-        for paper in blog_data.get('papers', []):
-            if paper['id'] == paper_id:
-                paper_to_delete = paper
-                break
+        # Remove from the store, then delete its file
+        paper_to_delete = content_store.delete(paper_id, PAPER_TYPE)
         
         if paper_to_delete:
-            # Delete the PDF file
-            pdf_path = os.path.join(PAPERS_FOLDER, paper_to_delete['filename'])
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
-        
-        # Remove from data
-        blog_data['papers'] = [paper for paper in blog_data.get('papers', []) if paper['id'] != paper_id]
-        
-        save_blog_data(blog_data)
+            remove_paper_file(paper_to_delete)
         
         return jsonify({'success': True, 'message': 'Technical paper deleted successfully'})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Startup timings of this process (workers forked from a preloaded master inherit
+# its import and warmup times)
+startup_times = {'import_seconds': None, 'warmup_seconds': None, 'first_request_seconds': None}
+
+def warmup():
+    """Compile the templates, render the home page and build the chatbot index
+
+    Run by gunicorn.conf.py before serving: in the master before the workers
+    fork when the app is preloaded, otherwise in each worker.
+    """
+    started = time.perf_counter()
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+    with app.test_request_context('/'):
+        index()
+    sync_chat_index()
+    startup_times['warmup_seconds'] = round(time.perf_counter() - started, 4)
+    print(f"Warmed up in {startup_times['warmup_seconds'] * 1000:.0f} ms")
+
+def record_first_request(seconds):
+    startup_times['first_request_seconds'] = round(seconds, 4)
+    print(f"First request of worker {os.getpid()} took {seconds * 1000:.0f} ms")
+    for phase, value in startup_times.items():
+        if value is not None:
+            metrics.startup(phase.replace('_seconds', ''), value)
+
+@app.route('/admin/api/startup')
+@login_required
+def api_startup_stats():
+    """Import, warmup and first request durations of this worker"""
+    return jsonify(dict(startup_times, pid=os.getpid()))
+
+startup_times['import_seconds'] = round(time.perf_counter() - IMPORT_STARTED, 4)
+print(f"Imported app in {startup_times['import_seconds'] * 1000:.0f} ms")
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,204 @@
+"""Bundled, minified and fingerprinted CSS/JS assets.
+
+``build_assets`` concatenates the source files of each bundle (inlining CSS
+``@import`` rules), minifies the result and writes it under the dist folder
+with the content hash in its name, plus a ``manifest.json`` mapping bundle
+names to those files. Templates resolve bundles through ``AssetManifest``,
+which falls back to the individual source files when no build exists, so
+local development works without a build step.
+"""
+import hashlib
+import json
+import os
+import re
+
+# Bundle name -> source files, relative to the static folder, in load order
+BUNDLES = {
+    'css/site.css': ['css/style.css', 'css/responsive.css'],
+    # Kept separate: theme.js swaps this stylesheet when the theme changes
+    'css/theme-dark.css': ['css/theme-dark.css'],
+    'js/site.js': ['js/particles-config.js', 'js/main.js', 'js/chatbot.js', 'js/theme.js'],
+}
+
+CSS_IMPORT_RE = re.compile(r"""@import\s+(?:url\()?\s*['"]?([^'")]+)['"]?\s*\)?\s*;""")
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+CSS_TOKEN_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/)', re.S)
+
+
+def read_css(static_folder, rel_path, seen=None):
+    """CSS source with ``@import`` inlined and relative ``url()`` made absolute"""
+    seen = seen if seen is not None else set()
+    if rel_path in seen:
+        return ''
+    seen.add(rel_path)
+    base = os.path.dirname(rel_path)
+    with open(os.path.join(static_folder, rel_path), 'r', encoding='utf-8') as f:
+        css = f.read()
+
+    def inline(match):
+        target = match.group(1)
+        if re.match(r'^(https?:)?//', target):
+            return match.group(0)
+        return read_css(static_folder, os.path.normpath(os.path.join(base, target)).replace(os.sep, '/'), seen)
+
+    def absolute(match):
+        quote, target = match.groups()
+        if re.match(r'^(data:|https?:|//|/|#)', target):
+            return match.group(0)
+        resolved = os.path.normpath(os.path.join(base, target)).replace(os.sep, '/')
+        return f'url({quote}/static/{resolved}{quote})'
+
+    return CSS_URL_RE.sub(absolute, CSS_IMPORT_RE.sub(inline, css))
+
+
+def minify_css(css):
+    """Drop comments and redundant whitespace, leaving string literals untouched"""
+    out = []
+    for i, part in enumerate(CSS_TOKEN_RE.split(css)):
+        if i % 2:
+            if not part.startswith('/*'):
+                out.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([{};,])\s*', r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        out.append(part)
+    return ''.join(out).replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """Conservative minifier: strips comments, indentation and blank lines
+
+    Newlines are kept so automatic semicolon insertion behaves exactly as in
+    the source, and string and template literals are copied verbatim.
+    """
+    out = []
+    i, n = 0, len(js)
+    last = ''  # Last significant character, to tell a regex from a division
+    while i < n:
+        c = js[i]
+        if c in '\'"`':
+            j = i + 1
+            while j < n and js[j] != c:
+                j += 2 if js[j] == '\\' else 1
+            out.append(js[i:j + 1])
+            last = c
+            i = j + 1
+        elif js.startswith('//', i):
+            end = js.find('\n', i)
+            i = n if end == -1 else end
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            out.append(' ')
+        elif c == '/' and (not last or last in '(,=:[!&|?{};+-*%<>~^'):
+            # Regular expression literal
+            j, in_class = i + 1, False
+            while j < n and (in_class or js[j] != '/') and js[j] != '\n':
+                if js[j] == '\\':
+                    j += 1
+                elif js[j] == '[':
+                    in_class = True
+                elif js[j] == ']':
+                    in_class = False
+                j += 1
+            out.append(js[i:j + 1])
+            last = '/'
+            i = j + 1
+        elif c == '\n':
+            # Drop trailing whitespace, blank lines and the next line's indentation
+            while out and out[-1] in (' ', '\t', '\r'):
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n')
+            i += 1
+            while i < n and js[i] in ' \t':
+                i += 1
+        else:
+            out.append(c)
+            if not c.isspace():
+                last = c
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def build_bundle(static_folder, name, sources):
+    if name.endswith('.css'):
+        return minify_css('\n'.join(read_css(static_folder, source) for source in sources))
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_folder, source), 'r', encoding='utf-8') as f:
+            parts.append(minify_js(f.read()))
+    # Guard against files that do not end their last statement with a semicolon
+    return ';\n'.join(parts)
+
+
+def build_assets(static_folder, dist_folder, bundles=BUNDLES):
+    """Write every bundle under its content hash and return the new manifest
+
+    Files from the previous build are kept, so pages cached by clients keep
+    working, and anything older is removed.
+    """
+    manifest_path = os.path.join(dist_folder, 'manifest.json')
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f)
+
+    manifest = {}
+    for name, sources in bundles.items():
+        content = build_bundle(static_folder, name, sources).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        output = f'{stem}.{digest}{ext}'
+        path = os.path.join(dist_folder, output)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(content)
+        manifest[name] = output
+
+    keep = set(manifest.values()) | set(previous.values()) | {'manifest.json'}
+    for root, _, files in os.walk(dist_folder):
+        for filename in files:
+            rel_path = os.path.relpath(os.path.join(root, filename), dist_folder).replace(os.sep, '/')
+            # Precompressed .br/.gz variants live and go with their file
+            if re.sub(r'\.(br|gz)$', '', rel_path) not in keep:
+                os.remove(os.path.join(root, filename))
+
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+class AssetManifest:
+    """Resolves bundle names to URLs, reloading the manifest when it changes"""
+
+    def __init__(self, dist_folder, bundles=BUNDLES):
+        self.path = os.path.join(dist_folder, 'manifest.json')
+        self.bundles = bundles
+        self._mtime = None
+        self._manifest = {}
+
+    def version(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            manifest = {}
+            if mtime is not None:
+                with open(self.path, 'r') as f:
+                    manifest = json.load(f)
+            self._manifest, self._mtime = manifest, mtime
+        return self._mtime
+
+    def urls(self, name, dist_url, static_url):
+        """URLs to load for bundle ``name``: one fingerprinted file, or its sources"""
+        self.version()
+        output = self._manifest.get(name)
+        if output:
+            return [dist_url(output)]
+        return [static_url(source) for source in self.bundles[name]]
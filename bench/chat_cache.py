@@ -0,0 +1,134 @@
+"""Chatbot answer cache benchmark: how much chatbot traffic reaches Gemini.
+
+Simulates visitors who each open a fresh conversation and ask one to three
+questions, every question picked from a few topics and phrased in one of
+several ways. The app runs in a scratch folder with the stub Gemini
+backend, so the run is deterministic, and the report compares the
+chatbot's upstream calls with the questions asked.
+
+Before that, every pair in ``REPHRASINGS`` is asked by two new visitors:
+the second question normalizes differently from the first, so it can
+only be answered from the cache by similarity. ``DISTINCT`` pairs must not
+be. The run exits with status 1 if any pair goes the wrong way.
+
+    python bench/chat_cache.py
+    python bench/chat_cache.py --max-upstream 0.3
+
+With ``--max-upstream`` the run also fails when a larger share of the
+questions than that reached the upstream model.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from loadtest import REPO_ROOT
+
+# The same questions in different words, as visitors ask them
+TOPICS = [
+    ['What projects has Pradyumna done?', 'Show me his projects', 'Which projects did he build?',
+     'Can you list the projects?', 'projects?'],
+    ['What is his experience?', 'Tell me about his work experience', 'What jobs has he had?',
+     'Tell me about his career'],
+    ['What skills does he have?', 'Show me his skills', 'What technologies does he use?', 'Tech stack?'],
+    ['Where did he study?', 'Where did Pradyumna study?', 'What is his education?'],
+    ['How can I contact him?', 'How do I reach Pradyumna?', "What's his email?"],
+    ['Has he worked with computer vision?', 'Has Pradyumna worked with computer vision?',
+     'computer vision work?'],
+]
+# (asked first, asked later): the later one must be answered from the cache
+REPHRASINGS = [
+    ('What projects has he done?', 'Which projects did Pradyumna build?'),
+    ('What is his work experience?', 'Tell me about his career'),
+    ('What skills does he have?', 'What technologies does he use?'),
+    ('Where did he study?', 'What is his education?'),
+    ('How can I contact him?', "What's his email?"),
+]
+# ... and these must not be
+DISTINCT = [
+    ('What projects has he done?', 'What Python projects has he done?'),
+    ('Where did he study?', 'Where did he work?'),
+    ('What skills does he have?', 'What deep learning skills does he have?'),
+]
+
+# Runs inside the child interpreter; the result is the last line of its output
+CHILD = '''
+import json, random
+import app
+from answer_cache import normalize_question
+
+def ask(message):
+    response = app.app.test_client().post('/api/chatbot', json={{'message': message}})
+    assert response.status_code == 200, response.status_code
+    return response.get_json()['cached']
+
+wrong = []
+for pairs, expected in (({rephrasings}, True), ({distinct}, False)):
+    for first, later in pairs:
+        assert normalize_question(first) != normalize_question(later), (first, later)
+        ask(first)
+        if ask(later) != expected:
+            wrong.append([first, later, expected])
+app.chat_answer_cache.clear()
+upstream_before = app.llm.stats().get('chatbot', {{}}).get('upstream_calls', 0)
+hits_before, near_before = app.chat_answer_cache.hits, app.chat_answer_cache.near_hits
+
+rng = random.Random({seed})
+topics = {topics}
+asked = cached = 0
+for visitor in range({visitors}):
+    client = app.app.test_client()
+    for _ in range(rng.randint(1, 3)):
+        response = client.post('/api/chatbot', json={{'message': rng.choice(rng.choice(topics))}})
+        assert response.status_code == 200, response.status_code
+        asked += 1
+        cached += response.get_json()['cached']
+upstream = app.llm.stats().get('chatbot', {{}}).get('upstream_calls', 0) - upstream_before
+print(json.dumps({{'questions': asked, 'cached': cached, 'upstream_calls': upstream, 'wrong': wrong,
+                   'hits': app.chat_answer_cache.hits - hits_before,
+                   'near_hits': app.chat_answer_cache.near_hits - near_before,
+                   'size': len(app.chat_answer_cache)}}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--visitors', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-upstream', type=float, help='Fail above this share of questions sent upstream')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='portfolio-chat-cache-')
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, LLM_BACKEND='stub', SECRET_KEY='bench',
+               AI_RATE_BURST='1000000')
+    env.pop('RENDER', None)
+    try:
+        child = CHILD.format(seed=args.seed, topics=TOPICS, visitors=args.visitors,
+                             rephrasings=REPHRASINGS, distinct=DISTINCT)
+        output = subprocess.run([sys.executable, '-c', child], cwd=workdir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = json.loads(output.strip().splitlines()[-1])
+    share = result['upstream_calls'] / result['questions']
+    checked = len(REPHRASINGS) + len(DISTINCT)
+    print(f"rephrasings: {checked - len(result['wrong'])}/{checked} pairs as expected")
+    for first, later, expected in result['wrong']:
+        print(f"  {later!r} after {first!r}: {'missed' if expected else 'wrongly answered from'} the cache")
+    print(f"{result['questions']} questions, {result['upstream_calls']} upstream calls ({share:.1%})")
+    print(f"cache: {result['hits']} hits ({result['near_hits']} rephrased), {result['size']} entries")
+
+    failed = bool(result['wrong'])
+    if args.max_upstream is not None and share > args.max_upstream:
+        print(f'More than {args.max_upstream:.0%} of the questions reached the upstream model')
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
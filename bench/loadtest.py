@@ -0,0 +1,354 @@
+"""Load test for the portfolio app with a stub Gemini backend and an SMTP sink.
+
+Boots the app in a subprocess (gunicorn when installed, else werkzeug's
+threaded server) inside a scratch folder, seeds a few blog posts, then runs
+a weighted mix of requests from a fixed number of client threads and reports
+requests/second and latency percentiles per route. Everything random is
+seeded, and Gemini is replaced by the gateway's stub backend with a fixed
+latency and jitter, so runs on the same machine are comparable.
+
+    python bench/loadtest.py --save bench/baselines/local.json
+    python bench/loadtest.py --compare bench/baselines/local.json
+
+A comparison run exits with status 1 when a route's p95/p99 latency grew, or
+its throughput shrank, by more than ``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from smtp_sink import SMTPSink
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Route -> share of the requests in the default mix
+DEFAULT_MIX = {
+    'index': 40,
+    'get_posts': 25,
+    'chatbot': 15,
+    'search': 10,
+    'contact': 4,
+    'upload_image': 4,
+    'upload_paper': 2,
+}
+
+CHAT_QUESTIONS = [
+    'What projects has Pradyumna worked on?',
+    'Which deep learning frameworks does he use?',
+    'Tell me about his experience with computer vision.',
+    'What did he study?',
+    'Has he written about MLOps?',
+]
+
+SEARCH_QUERIES = ['computer vision', 'pytorch', 'xray classification', 'osint', 'mlflow', 'violence detection']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+class Client:
+    """One simulated visitor: a session, a seeded RNG and the scenario functions"""
+
+    def __init__(self, base_url, seed):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.random = random.Random(seed)
+        self.etag = None
+        self.cursor = None
+
+    def login(self):
+        self.session.post(f'{self.base_url}/admin/login',
+                          json={'username': 'bench', 'password': 'bench'}).raise_for_status()
+
+    def index(self):
+        # Returning visitors revalidate their cached copy
+        headers = {'If-None-Match': self.etag} if self.etag and self.random.random() < 0.5 else {}
+        response = self.session.get(f'{self.base_url}/', headers=headers)
+        self.etag = response.headers.get('ETag', self.etag)
+        return response
+
+    def get_posts(self):
+        params = {'limit': 10, 'fields': 'title,slug,description'}
+        if self.cursor and self.random.random() < 0.5:
+            params['cursor'] = self.cursor
+        response = self.session.get(f'{self.base_url}/api/get_posts', params=params)
+        if response.ok:
+            self.cursor = response.json().get('next_cursor')
+        return response
+
+    def chatbot(self):
+        return self.session.post(f'{self.base_url}/api/chatbot',
+                                 json={'message': self.random.choice(CHAT_QUESTIONS)})
+
+    def search(self):
+        return self.session.post(f'{self.base_url}/api/search',
+                                 json={'query': self.random.choice(SEARCH_QUERIES)})
+
+    def contact(self):
+        return self.session.post(f'{self.base_url}/api/contact', json={
+            'name': 'Load Test', 'email': 'bench@example.com', 'message': 'Benchmark message'})
+
+    def upload_image(self):
+        data = b'GIF89a' + self.random.randbytes(32 * 1024)
+        return self.session.post(f'{self.base_url}/api/upload_image',
+                                 files={'file': ('bench.gif', data, 'image/gif')})
+
+    def upload_paper(self):
+        # Mostly new files, sometimes a re-upload of the same one
+        size = 256 * 1024
+        data = b'%PDF-1.4\n' + (b'\0' * size if self.random.random() < 0.3 else self.random.randbytes(size))
+        return self.session.post(f'{self.base_url}/api/upload_paper', data={'title': 'Bench paper'},
+                                 files={'file': ('bench.pdf', data, 'application/pdf')})
+
+
+class Server:
+    """The app running in a subprocess against a scratch data folder"""
+
+    def __init__(self, args, smtp_port):
+        self.args = args
+        self.port = free_port()
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        self.workdir = tempfile.mkdtemp(prefix='portfolio-bench-')
+        self.env = dict(os.environ,
+                        PYTHONPATH=REPO_ROOT,
+                        LLM_BACKEND='stub',
+                        STUB_LATENCY_MS=str(args.llm_latency_ms),
+                        STUB_JITTER_MS=str(args.llm_jitter_ms),
+                        ADMIN_USERNAME='bench',
+                        ADMIN_PASSWORD='bench',
+                        SECRET_KEY='bench',
+                        SMTP_SERVER='127.0.0.1',
+                        SMTP_PORT=str(smtp_port),
+                        SMTP_STARTTLS='0',
+                        SENDER_EMAIL='bench@example.com',
+                        AI_RATE_PER_MINUTE='1000000',
+                        AI_RATE_BURST='1000000',
+                        SEARCH_RATE_PER_MINUTE='1000000',
+                        SEARCH_RATE_BURST='1000000')
+        self.env.pop('RENDER', None)
+        self.process = None
+
+    def command(self):
+        if self.args.server == 'gunicorn':
+            return [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{self.port}',
+                    '--config', os.path.join(REPO_ROOT, 'gunicorn.conf.py'),
+                    '--worker-class', 'gthread', '--workers', str(self.args.workers),
+                    '--threads', str(self.args.threads), '--log-level', 'warning', 'app:app']
+        return [sys.executable, '-c',
+                'from werkzeug.serving import run_simple; import app; '
+                f"run_simple('127.0.0.1', {self.port}, app.app, threaded=True)"]
+
+    def start(self):
+        self.process = subprocess.Popen(self.command(), cwd=self.workdir, env=self.env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'Server exited: {self.process.stderr.read().decode()[-2000:]}')
+            try:
+                requests.get(f'{self.base_url}/', timeout=5)
+                return self
+            except requests.RequestException:
+                # Refused until the port is open, then slow while the app imports and warms up
+                time.sleep(0.2)
+        raise RuntimeError('Server did not start within 60 seconds')
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def seed_content(base_url, posts):
+    client = Client(base_url, seed=0)
+    client.login()
+    for i in range(posts):
+        client.session.post(f'{base_url}/api/create_blog', json={
+            'title': f'Benchmark post {i}',
+            'description': f'Post number {i} about computer vision and MLOps',
+            'content': '\n\n'.join(f'Paragraph {p} of post {i}.' for p in range(5))
+        }).raise_for_status()
+
+
+def run_load(base_url, mix, concurrency, duration, warmup, seed):
+    """Drive the mix from ``concurrency`` threads; return samples per route"""
+    routes, weights = zip(*mix.items())
+    samples = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    lock = threading.Lock()
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(index):
+        client = Client(base_url, seed=seed * 1000 + index)
+        client.login()
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            route = client.random.choices(routes, weights)[0]
+            began = time.perf_counter()
+            try:
+                ok = getattr(client, route)().status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - began
+            if now >= measure_from:
+                with lock:
+                    samples[route].append(elapsed)
+                    if not ok:
+                        errors[route] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors
+
+
+def summarize(samples, errors, duration):
+    def stats(values, error_count):
+        values = sorted(values)
+        return {
+            'requests': len(values),
+            'errors': error_count,
+            'rps': round(len(values) / duration, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        }
+
+    routes = {route: stats(values, errors[route]) for route, values in samples.items() if values}
+    everything = [value for values in samples.values() for value in values]
+    return routes, stats(everything, sum(errors.values()))
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result, baseline, tolerance):
+    """Return the list of regressions of ``result`` against ``baseline``"""
+    regressions = []
+    for route, base in baseline['routes'].items():
+        current = result['routes'].get(route)
+        if current is None:
+            continue
+        for metric in ('p95_ms', 'p99_ms'):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{route} {metric}: {base[metric]} -> {current[metric]}')
+        if base['rps'] and current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{route} rps: {base['rps']} -> {current['rps']}")
+    return regressions
+
+
+def print_table(result):
+    print(f"{'route':<14}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in sorted(result['routes'].items()) + [('TOTAL', result['total'])]:
+        print(f"{route:<14}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--duration', type=float, default=20, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds before that')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mix', type=json.loads, default=DEFAULT_MIX,
+                        help='JSON object of route -> weight, e.g. \'{"index": 1, "chatbot": 1}\'')
+    parser.add_argument('--posts', type=int, default=30, help='Blog posts created before the run')
+    parser.add_argument('--llm-latency-ms', type=float, default=800)
+    parser.add_argument('--llm-jitter-ms', type=float, default=400)
+    parser.add_argument('--server', choices=['gunicorn', 'werkzeug'],
+                        default='gunicorn' if shutil.which('gunicorn') else 'werkzeug')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--save', help='Write the result to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    sink = SMTPSink().start()
+    server = Server(args, sink.port).start()
+    try:
+        seed_content(server.base_url, args.posts)
+        samples, errors = run_load(server.base_url, args.mix, args.concurrency,
+                                   args.duration, args.warmup, args.seed)
+    finally:
+        server.stop()
+        sink.shutdown()
+
+    routes, total = summarize(samples, errors, args.duration)
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'server': args.server,
+            'workers': args.workers,
+            'threads': args.threads,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'seed': args.seed,
+            'mix': args.mix,
+            'llm_latency_ms': args.llm_latency_ms,
+            'llm_jitter_ms': args.llm_jitter_ms,
+            'emails_delivered': sink.messages,
+        },
+        'routes': routes,
+        'total': total,
+    }
+    print_table(result)
+    print(f"emails delivered to the SMTP sink: {sink.messages}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'Saved {args.save}')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.compare} (commit {baseline['meta'].get('commit')}):")
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Minimal SMTP server that accepts and counts every message, for benchmarks."""
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        self.reply('220 bench-sink ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip().upper()
+            if command.startswith('EHLO'):
+                self.wfile.write(b'250-bench-sink\r\n250 8BITMIME\r\n')
+            elif command.startswith('DATA'):
+                self.reply('354 end data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply('250 queued')
+            elif command.startswith('QUIT'):
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')  # HELO, MAIL, RCPT, RSET, NOOP
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Accepts mail on ``127.0.0.1:<port>`` in a background thread"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
@@ -0,0 +1,124 @@
+"""Startup benchmark: import time and first-request latency of the app.
+
+Each run starts a fresh interpreter in a scratch folder, imports the app,
+optionally warms it up the way gunicorn.conf.py does, and times the first
+request to the home page. The first run starts with empty on-disk caches
+(the Jinja bytecode cache among them) and is reported as ``cold``; the
+medians of the remaining runs are reported as ``warm``.
+
+    python bench/startup.py --save bench/baselines/startup.json
+    python bench/startup.py --compare bench/baselines/startup.json
+
+A comparison run exits with status 1 when a time grew by more than
+``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from loadtest import REPO_ROOT, git_commit
+
+# Runs inside the child interpreter; the result is the last line of its output
+CHILD = '''
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+if {warmup}:
+    app.warmup()
+warmed = time.perf_counter()
+response = app.app.test_client().get('/')
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - started) * 1000,
+                   'warmup_ms': (warmed - imported) * 1000,
+                   'first_request_ms': (done - warmed) * 1000}}))
+'''
+
+METRICS = ('process_ms', 'import_ms', 'warmup_ms', 'first_request_ms')
+
+
+def run_once(workdir, env, warmup):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD.format(warmup=warmup)], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    sample = json.loads(output.strip().splitlines()[-1])
+    sample['process_ms'] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def summarize(samples):
+    return {metric: round(statistics.median(s[metric] for s in samples), 2) for metric in METRICS}
+
+
+def compare(result, baseline, tolerance):
+    """Return the list of regressions of ``result`` against ``baseline``"""
+    regressions = []
+    for phase in ('cold', 'warm'):
+        for metric in METRICS:
+            base, current = baseline[phase].get(metric), result[phase].get(metric)
+            # Ignore changes of a few milliseconds, they are noise
+            if base and current > base * (1 + tolerance) and current - base > 5:
+                regressions.append(f'{phase} {metric}: {base} -> {current}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=6, help='Interpreters started, the first one cold')
+    parser.add_argument('--no-warmup', action='store_true', help='Skip app.warmup() before the first request')
+    parser.add_argument('--save', help='Write the result to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='portfolio-startup-')
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, LLM_BACKEND='stub', SECRET_KEY='bench')
+    env.pop('RENDER', None)
+    try:
+        samples = [run_once(workdir, env, not args.no_warmup) for _ in range(max(2, args.runs))]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'runs': len(samples),
+            'warmup': not args.no_warmup,
+        },
+        'cold': summarize(samples[:1]),
+        'warm': summarize(samples[1:]),
+    }
+    print(f"{'':<6}" + ''.join(f'{metric:>18}' for metric in METRICS))
+    for phase in ('cold', 'warm'):
+        print(f'{phase:<6}' + ''.join(f'{result[phase][metric]:>18}' for metric in METRICS))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'Saved {args.save}')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.compare} (commit {baseline['meta'].get('commit')}):")
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Markdown rendering for blog posts.
+
+Posts keep their Markdown source in the content store. The HTML body of a
+post is rendered once per distinct source (keyed on its SHA-256, so every
+post sharing a source shares the entry) and the page around it comes from
+``templates/blog_post.html``, so a change to the layout reaches every post
+on its next request without regenerating anything. Without the markdown
+package the source is rendered as escaped paragraphs.
+"""
+import hashlib
+import re
+
+from markupsafe import Markup, escape
+
+from cache import TTLCache
+
+try:
+    import markdown
+except ImportError:  # markdown is optional, posts fall back to plain paragraphs
+    markdown = None
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'smarty']
+# Part of the cache key, bump it when the rendering options above change
+RENDERER_VERSION = '1'
+
+
+def slugify(title):
+    """URL slug of a post title (the same rule posts have always used)"""
+    return re.sub(r'[^a-z0-9-]', '', title.lower().replace(' ', '-'))
+
+
+def render_markdown(source):
+    """HTML for a Markdown ``source``"""
+    if markdown is None:
+        return ''.join(f'<p>{escape(p.strip())}</p>' for p in source.split('\n') if p.strip())
+    return markdown.markdown(source, extensions=MARKDOWN_EXTENSIONS, output_format='html')
+
+
+class FragmentCache(TTLCache):
+    """Rendered post bodies keyed on the hash of their source"""
+
+    def __init__(self, maxsize=256, ttl=7 * 24 * 60 * 60):
+        super().__init__(maxsize=maxsize, ttl=ttl, name='blog_fragments')
+
+    def render(self, source):
+        key = hashlib.sha256(f'{RENDERER_VERSION}\0{source}'.encode('utf-8')).hexdigest()
+        html = self.get(key)
+        if html is None:
+            html = Markup(render_markdown(source))
+            self.set(key, html)
+        return html
@@ -0,0 +1,31 @@
+"""Claim files that let one worker process do a piece of background work.
+
+``claim`` creates ``path`` exclusively, so of all the worker processes
+sharing a folder only one gets to generate or parse the item behind it; the
+others skip it and pick up the result later. A claim older than
+``stale_after`` seconds was left behind by a worker that died mid-task and
+is taken over. ``release`` removes the claim once the result is stored.
+"""
+import os
+import time
+
+
+def claim(path, stale_after):
+    """Create the claim file ``path``; False if another worker holds it"""
+    try:
+        if time.time() - os.path.getmtime(path) > stale_after:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def release(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,369 @@
+"""Content store for blog posts and technical papers.
+
+Records are plain dicts (the same shape the admin routes always produced) with
+a ``type`` of ``'blog'`` or ``'paper'``. Two backends are available:
+
+* ``SQLiteContentStore`` - the default. One row per record, indexed on id,
+  slug, type and date, with WAL journaling so readers never block the writer.
+* ``JSONContentStore`` - the original ``blog_data.json`` document, kept for
+  setups that want a single hand-editable file. It is parsed once per change
+  and written atomically under a lock, so it is safe with ``gunicorn -w N``.
+"""
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines have no fcntl
+    fcntl = None
+
+POST_TYPE = 'blog'
+PAPER_TYPE = 'paper'
+
+# Section of blog_data.json each record type lives in
+SECTIONS = {POST_TYPE: 'posts', PAPER_TYPE: 'papers'}
+
+
+def record_date(record):
+    """Date used for ordering a record (posts and papers name it differently)"""
+    return record.get('created_date') or record.get('upload_date') or record.get('date') or ''
+
+
+def thread_local_sqlite(path):
+    """Function returning the calling thread's connection to the database at ``path``
+
+    One connection per thread, reopened after a fork (gunicorn --preload), with
+    WAL journaling so readers never block the writer.
+    """
+    local = threading.local()
+
+    def connect():
+        conn = getattr(local, 'conn', None)
+        if conn is None or local.pid != os.getpid():
+            conn = sqlite3.connect(path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            local.conn = conn
+            local.pid = os.getpid()
+        return conn
+    return connect
+
+
+def page_key(record):
+    """Position of a record in ``page()`` order, usable as the ``before`` argument"""
+    return (record_date(record), record['id'])
+
+
+class ContentStore:
+    """Interface shared by the content store backends"""
+
+    def list(self, content_type=None):
+        """Return records of ``content_type`` (or all records), oldest first"""
+        raise NotImplementedError
+
+    def get(self, content_id):
+        raise NotImplementedError
+
+    def get_by_slug(self, slug):
+        raise NotImplementedError
+
+    def insert(self, record):
+        raise NotImplementedError
+
+    def update(self, content_id, fields):
+        """Merge ``fields`` into a record and return it (None if missing)"""
+        raise NotImplementedError
+
+    def delete(self, content_id, content_type=None):
+        """Remove a record and return it (None if missing or of another type)"""
+        raise NotImplementedError
+
+    def version(self):
+        """Opaque token that changes whenever any record changes, in any worker"""
+        raise NotImplementedError
+
+    def page(self, content_type=None, limit=10, before=None):
+        """Return up to ``limit`` records, newest first, positioned after ``before``
+
+        ``before`` is the ``page_key()`` of the last record of the previous
+        page, so pages stay stable while new records are added.
+        """
+        records = sorted(self.list(content_type), key=page_key, reverse=True)
+        if before:
+            records = [record for record in records if page_key(record) < tuple(before)]
+        return records[:limit]
+
+    def as_blog_data(self):
+        """Return the legacy ``{'posts': [...], 'papers': [...]}`` document"""
+        return {section: self.list(content_type) for content_type, section in SECTIONS.items()}
+
+
+class SQLiteContentStore(ContentStore):
+    """Content store backed by an SQLite database in WAL mode"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content (
+            id TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            slug TEXT,
+            date TEXT NOT NULL DEFAULT '',
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_content_slug ON content (slug);
+        DROP INDEX IF EXISTS idx_content_type_date;
+        DROP INDEX IF EXISTS idx_content_date;
+        CREATE INDEX IF NOT EXISTS idx_content_type_date_id ON content (type, date, id);
+        CREATE INDEX IF NOT EXISTS idx_content_date_id ON content (date, id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connect = thread_local_sqlite(path)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _row_values(self, record):
+        return (record['id'], record['type'], record.get('slug'),
+                record_date(record), json.dumps(record))
+
+    def list(self, content_type=None):
+        conn = self._connect()
+        if content_type:
+            rows = conn.execute('SELECT data FROM content WHERE type = ? ORDER BY date, rowid',
+                                (content_type,))
+        else:
+            rows = conn.execute('SELECT data FROM content ORDER BY date, rowid')
+        return [json.loads(data) for (data,) in rows]
+
+    def page(self, content_type=None, limit=10, before=None):
+        # Keyset pagination: each page is one index range scan, however deep it is
+        clauses, params = [], []
+        if content_type:
+            clauses.append('type = ?')
+            params.append(content_type)
+        if before:
+            clauses.append('(date, id) < (?, ?)')
+            params.extend(before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connect().execute(
+            f'SELECT data FROM content {where} ORDER BY date DESC, id DESC LIMIT ?', params + [limit])
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, content_id):
+        row = self._connect().execute('SELECT data FROM content WHERE id = ?',
+                                      (content_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_by_slug(self, slug):
+        row = self._connect().execute('SELECT data FROM content WHERE slug = ? ORDER BY date DESC LIMIT 1',
+                                      (slug,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _bump_version(self, conn):
+        conn.execute("INSERT INTO meta (key, value) VALUES ('version', '1') "
+                     "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def version(self):
+        return self.get_meta('version', '0')
+
+    def insert(self, record):
+        with self._connect() as conn:
+            conn.execute('INSERT INTO content (id, type, slug, date, data) VALUES (?, ?, ?, ?, ?)',
+                         self._row_values(record))
+            self._bump_version(conn)
+        return record
+
+    def update(self, content_id, fields):
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM content WHERE id = ?', (content_id,)).fetchone()
+            if not row:
+                return None
+            record = json.loads(row[0])
+            record.update(fields)
+            conn.execute('UPDATE content SET type = ?, slug = ?, date = ?, data = ? WHERE id = ?',
+                         self._row_values(record)[1:] + (content_id,))
+            self._bump_version(conn)
+        return record
+
+    def delete(self, content_id, content_type=None):
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM content WHERE id = ?', (content_id,)).fetchone()
+            if not row:
+                return None
+            record = json.loads(row[0])
+            if content_type and record.get('type') != content_type:
+                return None
+            conn.execute('DELETE FROM content WHERE id = ?', (content_id,))
+            self._bump_version(conn)
+        return record
+
+    def get_meta(self, key, default=None):
+        row = self._connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def import_blog_data(self, blog_data):
+        """Insert every record of a ``blog_data.json`` document, skipping known ids"""
+        imported = 0
+        with self._connect() as conn:
+            for content_type, section in SECTIONS.items():
+                for record in blog_data.get(section, []):
+                    record = dict(record)
+                    record.setdefault('type', content_type)
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO content (id, type, slug, date, data) VALUES (?, ?, ?, ?, ?)',
+                        self._row_values(record))
+                    imported += cursor.rowcount
+            if imported:
+                self._bump_version(conn)
+        return imported
+
+
+class JSONContentStore(ContentStore):
+    """Content store backed by the original ``blog_data.json`` document
+
+    The parsed document is cached in memory and only re-read when the file's
+    mtime, size or inode changes. Writes go to a temp file that is renamed
+    into place, and every read-modify-write cycle holds an exclusive
+    ``fcntl`` lock on ``<path>.lock`` so concurrent workers never interleave.
+    Documents returned by ``load()`` are shared and must not be mutated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self._cache = None
+        self._cache_key = None
+        self._mutex = threading.RLock()
+
+    def _file_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def version(self):
+        key = self._file_key()
+        return '-'.join(str(part) for part in key) if key else '0'
+
+    def load(self):
+        key = self._file_key()
+        if key is None:
+            return {'posts': [], 'papers': []}
+        if key != self._cache_key:
+            with self._mutex:
+                key = self._file_key()
+                if key != self._cache_key:
+                    with open(self.path, 'r') as f:
+                        self._cache = json.load(f)
+                    self._cache_key = key
+        return self._cache
+
+    def save(self, data):
+        """Atomically replace the file with ``data`` and refresh the cache"""
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.blog_data.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._mutex:
+            self._cache = data
+            self._cache_key = self._file_key()
+
+    @contextmanager
+    def transaction(self):
+        """Yield a private copy of the document and save it on success
+
+        The exclusive lock covers the whole read-modify-write cycle, across
+        threads (RLock) and across worker processes (flock).
+        """
+        with self._mutex:
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    data = copy.deepcopy(self.load())
+                    yield data
+                    self.save(data)
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _records(self, data):
+        for content_type, section in SECTIONS.items():
+            for record in data.get(section, []):
+                yield content_type, section, record
+
+    def list(self, content_type=None):
+        data = self.load()
+        records = [record for record_type, _, record in self._records(data)
+                   if not content_type or record_type == content_type]
+        return sorted(records, key=record_date) if not content_type else records
+
+    def get(self, content_id):
+        for _, _, record in self._records(self.load()):
+            if record['id'] == content_id:
+                return record
+        return None
+
+    def get_by_slug(self, slug):
+        for _, _, record in self._records(self.load()):
+            if record.get('slug') == slug:
+                return record
+        return None
+
+    def insert(self, record):
+        with self.transaction() as data:
+            data.setdefault(SECTIONS[record['type']], []).append(record)
+        return record
+
+    def update(self, content_id, fields):
+        with self.transaction() as data:
+            for _, _, record in self._records(data):
+                if record['id'] == content_id:
+                    record.update(fields)
+                    return record
+        return None
+
+    def delete(self, content_id, content_type=None):
+        with self.transaction() as data:
+            for record_type, section, record in self._records(data):
+                if record['id'] == content_id:
+                    if content_type and record_type != content_type:
+                        return None
+                    data[section] = [r for r in data[section] if r['id'] != content_id]
+                    return record
+        return None
+
+
+def open_content_store(backend, data_folder, blog_data_file):
+    """Open the configured content store, importing ``blog_data.json`` once"""
+    if backend == 'json':
+        return JSONContentStore(blog_data_file)
+
+    store = SQLiteContentStore(os.path.join(data_folder, 'content.db'))
+    if store.get_meta('imported_from') is None and os.path.exists(blog_data_file):
+        imported = store.import_blog_data(JSONContentStore(blog_data_file).load())
+        store.set_meta('imported_from', blog_data_file)
+        print(f"Imported {imported} records from {blog_data_file} into the content store")
+    return store
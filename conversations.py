@@ -0,0 +1,113 @@
+"""Server-side memory for chatbot conversations.
+
+Conversations live in a small SQLite database so every gunicorn worker sees
+the same history. The store is bounded twice: conversations idle for longer
+than ``ttl`` seconds expire, and beyond ``max_conversations`` the least
+recently used ones are dropped. Each conversation is bounded too: after
+every turn the oldest turns are folded into a short running summary until
+the kept turns fit ``token_budget``, so the history added to a prompt never
+grows, however long a visitor chats. Tokens are estimated at four
+characters each, which is close enough for budgeting.
+"""
+import json
+import time
+
+from content_store import thread_local_sqlite
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clip(text, tokens):
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + '...'
+
+
+def format_history(summary, turns):
+    """Prompt text for a conversation's ``(summary, turns)`` ('' for a new one)"""
+    lines = [f"Earlier the visitor asked: {summary}"] if summary else []
+    for turn in turns:
+        lines.append(f"User: {turn['q']}")
+        lines.append(f"Response: {turn['a']}")
+    return '\n'.join(lines)
+
+
+class ConversationStore:
+    """Conversation histories keyed by id, bounded in number, age and size"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id TEXT PRIMARY KEY,
+            updated REAL NOT NULL,
+            summary TEXT NOT NULL DEFAULT '',
+            turns TEXT NOT NULL DEFAULT '[]'
+        );
+        CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations (updated);
+    """
+
+    def __init__(self, path, max_conversations=1000, ttl=1800, token_budget=600,
+                 summary_tokens=150, turn_tokens=200):
+        self.path = path
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.turn_tokens = turn_tokens
+        self.compactions = 0
+        self.evictions = 0
+        self._connect = thread_local_sqlite(path)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def get(self, conversation_id):
+        """``(summary, turns)`` of a conversation; empty if unknown or expired"""
+        row = self._connect().execute('SELECT updated, summary, turns FROM conversations WHERE id = ?',
+                                      (conversation_id,)).fetchone()
+        if not row or time.time() - row[0] > self.ttl:
+            return '', []
+        return row[1], json.loads(row[2])
+
+    def append(self, conversation_id, question, answer):
+        """Add a turn, compact the conversation to the budget and evict old conversations"""
+        summary, turns = self.get(conversation_id)
+        turns.append({'q': _clip(question, self.turn_tokens), 'a': _clip(answer, self.turn_tokens)})
+        summary, turns = self.compact(summary, turns)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO conversations (id, updated, summary, turns) VALUES (?, ?, ?, ?)',
+                         (conversation_id, now, summary, json.dumps(turns, separators=(',', ':'))))
+            expired = conn.execute('DELETE FROM conversations WHERE updated < ?', (now - self.ttl,)).rowcount
+            # Least recently used beyond the cap
+            overflow = conn.execute(
+                'DELETE FROM conversations WHERE id IN (SELECT id FROM conversations '
+                'ORDER BY updated DESC LIMIT -1 OFFSET ?)', (self.max_conversations,)).rowcount
+        self.evictions += expired + overflow
+
+    def compact(self, summary, turns):
+        """Fold the oldest turns into the summary until the rest fits the token budget"""
+        budget = self.token_budget - estimate_tokens(summary)
+        while len(turns) > 1 and sum(estimate_tokens(t['q'] + t['a']) for t in turns) > budget:
+            oldest = turns.pop(0)
+            # Keep what was asked; the answers were grounded in site content that retrieval brings back
+            summary = f"{summary} {oldest['q']}".strip()
+            limit = self.summary_tokens * CHARS_PER_TOKEN
+            if len(summary) > limit:
+                summary = '...' + summary[3 - limit:].lstrip()  # Drop the oldest questions first
+            budget = self.token_budget - estimate_tokens(summary)
+            self.compactions += 1
+        return summary, turns
+
+    def stats(self):
+        count, oldest = self._connect().execute('SELECT COUNT(*), MIN(updated) FROM conversations').fetchone()
+        return {
+            'conversations': count,
+            'max_conversations': self.max_conversations,
+            'ttl': self.ttl,
+            'token_budget': self.token_budget,
+            'oldest_age': round(time.time() - oldest) if oldest else 0,
+            'compactions': self.compactions,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,256 @@
+"""Stored AI enrichments of the portfolio's projects and skills.
+
+Project tags and the skill analysis only depend on data that changes with a
+deploy, so they are generated once by a background thread instead of per
+visitor. All projects go to Gemini in batches of ``batch_size`` per call,
+the JSON in each response is parsed and validated, and every valid result
+is stored as ``<folder>/<input hash>.json``. The hash covers the inputs and
+``PROMPT_VERSION``, so after a deploy only entries whose inputs changed are
+generated again. A ``.claim`` file makes sure only one worker generates each
+entry; the others pick up the stored files.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from claims import claim, release
+
+# Part of every input hash, bump it when the prompts or validation change
+PROMPT_VERSION = '1'
+DIFFICULTIES = ('Beginner', 'Intermediate', 'Advanced')
+
+
+def input_hash(kind, inputs):
+    data = json.dumps([PROMPT_VERSION, kind, inputs], sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def extract_json(text):
+    """Parse the first JSON value in a model response, ignoring code fences and prose around it"""
+    fence = re.search(r'```(?:json)?\s*(.*?)```', text, re.S)
+    if fence:
+        text = fence.group(1)
+    starts = [i for i in (text.find('{'), text.find('[')) if i >= 0]
+    if not starts:
+        raise ValueError('No JSON in the response')
+    value, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+    return value
+
+
+def _strings(value, field, limit):
+    if not isinstance(value, list):
+        raise ValueError(f'{field} is not a list')
+    strings = [str(item).strip() for item in value if str(item).strip()]
+    if not strings:
+        raise ValueError(f'{field} is empty')
+    return strings[:limit]
+
+
+def _text(value, field):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f'{field} is missing')
+    return value.strip()
+
+
+def validate_project_tags(data):
+    """Normalized ``{tags, applications, difficulty}``; raises ValueError if malformed"""
+    if not isinstance(data, dict):
+        raise ValueError('Project tags are not an object')
+    difficulty = _text(data.get('difficulty'), 'difficulty').capitalize()
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f'Unknown difficulty: {difficulty}')
+    return {
+        'tags': _strings(data.get('tags'), 'tags', 7),
+        'applications': _strings(data.get('applications'), 'applications', 3),
+        'difficulty': difficulty
+    }
+
+
+def validate_skill_analysis(data):
+    """Normalized ``{emerging_skills, specialization, explanation}``; raises ValueError if malformed"""
+    if not isinstance(data, dict):
+        raise ValueError('Skill analysis is not an object')
+    return {
+        'emerging_skills': _strings(data.get('emerging_skills'), 'emerging_skills', 3),
+        'specialization': _text(data.get('specialization'), 'specialization'),
+        'explanation': _text(data.get('explanation'), 'explanation')
+    }
+
+
+def project_tags_prompt(projects):
+    """One prompt for several projects, answered with a JSON array in the same order"""
+    listing = '\n'.join(f"{i}. Title: {project['title']}\n   Description: {project['description']}"
+                        for i, project in enumerate(projects))
+    return f"""
+    For each of these projects:
+    {listing}
+
+    Generate:
+    1. A list of 5-7 relevant technology tags
+    2. 2-3 industry application areas
+    3. A difficulty level (Beginner, Intermediate, Advanced)
+
+    Format the response as a JSON array with one object per project, in the same order, with keys:
+    "index" (the project number), "tags", "applications", "difficulty"
+    """
+
+
+def skill_analysis_prompt(skills_list):
+    return f"""
+    Based on these skills: {', '.join(skills_list)}
+
+    Suggest:
+    1. Three emerging technologies or skills that would complement this skill set
+    2. One specific area where deeper specialization would be valuable
+    3. A brief explanation of why these suggestions are relevant in today's tech landscape
+
+    Format as JSON with keys: "emerging_skills", "specialization", "explanation"
+    """
+
+
+class Enricher:
+    """Generates, stores and serves the enrichments of ``projects`` and ``skills_list``"""
+
+    def __init__(self, llm, folder, projects, skills_list, batch_size=8, retry_interval=60, stale_after=600):
+        self.llm = llm
+        self.folder = folder
+        self.projects = projects
+        self.skills_list = skills_list
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.stale_after = stale_after
+        self.generated = 0
+        self.invalid = 0
+        self.upstream_calls = 0
+        self._results = {}
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.folder, f'{key}{suffix}')
+
+    @staticmethod
+    def project_key(project):
+        return input_hash('project_tags', {'title': project['title'], 'description': project['description']})
+
+    @staticmethod
+    def skills_key(skills_list):
+        return input_hash('skill_analysis', sorted({skill.strip().lower() for skill in skills_list}))
+
+    def _load(self, key):
+        result = self._results.get(key)
+        if result is None:
+            try:
+                with open(self._path(key, '.json'), 'r') as f:
+                    result = self._results[key] = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return None
+        return result
+
+    def _store(self, key, result):
+        tmp_path = self._path(key, f'.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, self._path(key, '.json'))
+        self._results[key] = result
+        self.generated += 1
+        self._release(key)
+
+    def _claim(self, key):
+        return claim(self._path(key, '.claim'), self.stale_after)
+
+    def _release(self, key):
+        release(self._path(key, '.claim'))
+
+    def project_tags(self, title):
+        """Stored tags of the portfolio project called ``title`` (None if not generated yet)"""
+        project = next((p for p in self.projects if p['title'] == title), None)
+        return self._load(self.project_key(project)) if project else None
+
+    def skill_analysis(self, skills_list):
+        """Stored analysis if ``skills_list`` is the portfolio's own skill set (None otherwise)"""
+        key = self.skills_key(skills_list)
+        return self._load(key) if key == self.skills_key(self.skills_list) else None
+
+    def missing(self):
+        """Input keys without a stored result"""
+        keys = [self.project_key(project) for project in self.projects] + [self.skills_key(self.skills_list)]
+        return [key for key in keys if self._load(key) is None]
+
+    def start(self):
+        """Start the enrichment thread once per process if anything is missing"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='enrichment', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        delay = self.retry_interval
+        while self.missing():
+            try:
+                self.enrich_missing()
+            except Exception as e:
+                print(f"Enrichment error: {str(e)}")
+            if self.missing():
+                # Failed, or another worker is generating; back off up to an hour
+                time.sleep(delay)
+                delay = min(delay * 2, 3600)
+
+    def enrich_missing(self):
+        """Generate every missing entry this worker can claim"""
+        pending = [project for project in self.projects
+                   if self._load(self.project_key(project)) is None and self._claim(self.project_key(project))]
+        for start in range(0, len(pending), self.batch_size):
+            self._enrich_projects(pending[start:start + self.batch_size])
+
+        key = self.skills_key(self.skills_list)
+        if self._load(key) is None and self._claim(key):
+            try:
+                self.upstream_calls += 1
+                response = self.llm.generate(skill_analysis_prompt(self.skills_list), route='enrich_skills')
+                self._store(key, validate_skill_analysis(extract_json(response)))
+            except Exception as e:
+                self.invalid += 1
+                self._release(key)
+                print(f"Skill analysis enrichment failed: {str(e)}")
+
+    def _enrich_projects(self, batch):
+        keys = [self.project_key(project) for project in batch]
+        try:
+            self.upstream_calls += 1
+            items = extract_json(self.llm.generate(project_tags_prompt(batch), route='enrich_projects'))
+            if not isinstance(items, list):
+                raise ValueError('Response is not a JSON array')
+        except Exception as e:
+            for key in keys:
+                self._release(key)
+            print(f"Project enrichment failed for {len(batch)} projects: {str(e)}")
+            return
+        by_index = {}
+        for position, item in enumerate(items):
+            index = item.get('index', position) if isinstance(item, dict) else position
+            by_index.setdefault(int(index) if str(index).isdigit() else position, item)
+        for i, (project, key) in enumerate(zip(batch, keys)):
+            try:
+                self._store(key, validate_project_tags(by_index.get(i)))
+            except ValueError as e:
+                # Left unclaimed so the next run asks for it again
+                self.invalid += 1
+                self._release(key)
+                print(f"Invalid enrichment for project '{project['title']}': {str(e)}")
+
+    def stats(self):
+        return {
+            'missing': len(self.missing()),
+            'generated': self.generated,
+            'invalid': self.invalid,
+            'upstream_calls': self.upstream_calls
+        }
@@ -0,0 +1,109 @@
+"""Locally computed answers for the AI features, used when Gemini is not.
+
+Each function returns the same shape as the validated Gemini answer of the
+matching route, so the frontend renders them without knowing the difference.
+"""
+import re
+
+# Opening line of the bio for each visitor type the frontend sends
+BIO_OPENINGS = {
+    'recruiter': '{name} is a Software Engineer focused on AI and machine learning, based in {location}.',
+    'peer developer': '{name} is an engineer who enjoys building AI systems end to end, from data pipelines to deployed models.',
+    'student': '{name} is an AI engineer who has walked the path from coursework to real-world machine learning projects.',
+    'ai researcher': '{name} works where AI research meets engineering, with interests ranging from computer vision to NeuroSymbolic AI.',
+    'general': '{name} is an engineer building intelligent systems, based in {location}.',
+}
+
+# Skill -> complementary skills worth suggesting
+SKILL_SUGGESTIONS = {
+    'python': ['FastAPI', 'Ray', 'Polars'],
+    'tensorflow': ['TensorFlow Lite', 'JAX', 'ONNX Runtime'],
+    'pytorch': ['PyTorch Lightning', 'TorchServe', 'ONNX Runtime'],
+    'opencv': ['Vision Transformers', 'Segment Anything', 'NVIDIA DeepStream'],
+    'yolo': ['RT-DETR', 'Multi-Object Tracking', 'Edge TPU deployment'],
+    'docker': ['Kubernetes', 'Terraform', 'GitHub Actions'],
+    'mlflow': ['Kubeflow', 'Feature Stores', 'Model Monitoring'],
+    'computer vision': ['Vision-Language Models', 'Diffusion Models', '3D Vision'],
+    'nlp': ['Retrieval-Augmented Generation', 'LLM Fine-Tuning', 'Vector Databases'],
+    'neurosymbolic ai': ['Knowledge Graphs', 'Probabilistic Programming', 'LLM Reasoning'],
+    'transfer learning': ['Parameter-Efficient Fine-Tuning', 'Self-Supervised Learning', 'Domain Adaptation'],
+    'r': ['Bayesian Modeling', 'Causal Inference', 'Shiny Dashboards'],
+}
+DEFAULT_SUGGESTIONS = ['Retrieval-Augmented Generation', 'MLOps', 'Model Monitoring']
+
+# Keyword in a project -> industry where it applies
+APPLICATION_KEYWORDS = {
+    'video': 'Media & Content Moderation',
+    'violence': 'Public Safety',
+    'surveillance': 'Security',
+    'deepfake': 'Digital Forensics',
+    'osint': 'Cyber Threat Intelligence',
+    'x-ray': 'Healthcare',
+    'xray': 'Healthcare',
+    'medical': 'Healthcare',
+    'chest': 'Healthcare',
+    'image': 'Computer Vision Services',
+    'text': 'Document Processing',
+    'chat': 'Customer Support',
+}
+
+
+def bio(personal_info, skills, visitor_type):
+    """Short bio assembled from the profile data"""
+    opening = BIO_OPENINGS.get(visitor_type, BIO_OPENINGS['general'])
+    tools = ', '.join(skills.get('tools_frameworks', [])[:4])
+    focus = ', '.join(skills.get('ai_ml_specializations', [])[:3])
+    return ' '.join([
+        opening.format(**personal_info),
+        f"Core tools include {tools}, with a focus on {focus}." if tools and focus else '',
+        personal_info.get('profile_summary', ''),
+    ]).strip()
+
+
+def skill_analysis(skills_list):
+    """Suggestions for ``skills_list`` from ``SKILL_SUGGESTIONS``"""
+    known = {skill.lower() for skill in skills_list}
+    suggestions = []
+    for skill in skills_list:
+        for suggestion in SKILL_SUGGESTIONS.get(skill.lower(), []):
+            if suggestion.lower() not in known and suggestion not in suggestions:
+                suggestions.append(suggestion)
+    suggestions = (suggestions + [s for s in DEFAULT_SUGGESTIONS if s not in suggestions])[:3]
+    anchor = next((skill for skill in skills_list if skill.lower() in SKILL_SUGGESTIONS), None)
+    specialization = (f"Production {anchor} systems: deployment, monitoring and optimization"
+                      if anchor else 'MLOps: taking models reliably from research to production')
+    return {
+        'emerging_skills': suggestions,
+        'specialization': specialization,
+        'explanation': 'These build directly on the existing skill set and are in demand as teams '
+                       'move AI from prototypes into reliable, scalable products.'
+    }
+
+
+def project_tags(title, description, projects, known_tools):
+    """Tags, applications and difficulty for a project
+
+    A portfolio project reuses its own tool list; anything else gets the known
+    tool names that appear in its title or description.
+    """
+    text = f'{title} {description}'.lower()
+    title = title.strip().lower()
+    project = next((p for p in projects if len(title) > 3 and (title in p['title'].lower() or p['title'].lower() in title)),
+                   None)
+    if project:
+        tags = list(project['tools'])
+    else:
+        tags = [tool for tool in known_tools if re.search(rf'\b{re.escape(tool.lower())}\b', text)]
+    applications = list(dict.fromkeys(industry for keyword, industry in APPLICATION_KEYWORDS.items()
+                                      if keyword in text))[:3] or ['Applied AI']
+    difficulty = 'Advanced' if len(tags) >= 5 else 'Intermediate' if len(tags) >= 3 else 'Beginner'
+    return {'tags': tags[:7], 'applications': applications, 'difficulty': difficulty}
+
+
+def chat_answer(chunks):
+    """Answer from the retrieved site content when the chatbot model is unavailable"""
+    if not chunks:
+        return ("I can't reach my language model right now. You can find Pradyumna's projects, "
+                "experience and contact details on this page.")
+    facts = ' '.join(chunk['text'] for chunk in chunks[:2])
+    return f"I can't reach my language model right now, but here is what I found: {facts}"
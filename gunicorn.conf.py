@@ -0,0 +1,36 @@
+"""Gunicorn settings, read automatically when gunicorn starts in this folder."""
+import os
+import shutil
+
+# Workers write their metrics here so /metrics can add them up (see metrics.py)
+DATA_FOLDER = 'static/data' if os.getenv('RENDER') else 'data'
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(DATA_FOLDER, 'metrics'))
+
+
+def on_starting(server):
+    # Samples left by the previous run would be added to this one
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def when_ready(server):
+    # With --preload the app is already imported here, so warming it up once
+    # lets every worker inherit the compiled templates and rendered pages
+    if server.cfg.preload_app:
+        import app
+        app.warmup()
+
+
+def post_worker_init(worker):
+    # Without --preload each worker imports the app itself and warms up alone
+    if not worker.cfg.preload_app:
+        import app
+        app.warmup()
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
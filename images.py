@@ -0,0 +1,184 @@
+"""Resized, format-negotiated image derivatives with an on-disk LRU cache.
+
+A derivative is the source image scaled down to one of ``WIDTHS`` and encoded
+as WebP or JPEG (PNG when the source has transparency and the client does not
+accept WebP). Derivatives are rendered in a process pool the first time they
+are requested and kept in a cache folder that is trimmed back to
+``max_bytes``, least recently used first. Without Pillow the originals are
+served unchanged.
+"""
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Pillow is optional, originals are served without it. It is imported on
+# first use, so only processes that look at images pay for the import
+PIL_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+# Standard widths; requests are rounded up to one of these to bound the cache
+WIDTHS = (320, 640, 960, 1280, 1920)
+RESIZABLE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.gif'}
+MIMETYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+
+def render_derivative(source_path, dest_path, width, image_format, quality):
+    """Scale ``source_path`` to at most ``width`` pixels wide and save it (runs in a worker process)"""
+    from PIL import Image
+    with Image.open(source_path) as image:
+        image.seek(0)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if image_format == 'jpeg':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        tmp_path = f'{dest_path}.{os.getpid()}.tmp'
+        options = {'optimize': True} if image_format == 'png' else {'quality': quality}
+        image.save(tmp_path, format=image_format.upper(), **options)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+class ImageResizer:
+    """Creates derivatives on demand and keeps them in a size-capped disk cache"""
+
+    def __init__(self, cache_folder, max_bytes=200 * 1024 * 1024, workers=2, quality=80):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.quality = quality
+        self.hits = 0
+        self.misses = 0
+        self.on_lookup = None  # Optional callback(name, hit), e.g. for metrics
+        self._pool = None
+        self._pool_pid = None
+        self._inflight = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_folder, exist_ok=True)
+
+    @property
+    def available(self):
+        return PIL_AVAILABLE
+
+    def _executor(self):
+        # Pools do not survive a fork, so each worker process creates its own
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _source_info(self, source_path):
+        """(width, has_alpha) of a source image, cached per file version; None if Pillow cannot read it"""
+        st = os.stat(source_path)
+        key = (source_path, st.st_mtime_ns, st.st_size)
+        if key not in self._sources:
+            from PIL import Image
+            try:
+                with Image.open(source_path) as image:
+                    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+                    self._sources[key] = (image.width, has_alpha)
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                print(f"Not resizing {source_path}: {str(e)}")
+                self._sources[key] = None
+        return self._sources[key]
+
+    def widths_for(self, source_path):
+        """Standard widths worth offering for a source (never upscaled)"""
+        if not self.available or os.path.splitext(source_path)[1].lower() not in RESIZABLE_EXTENSIONS:
+            return []
+        info = self._source_info(source_path)
+        if info is None:
+            return []
+        width = info[0]
+        return [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+
+    def choose_format(self, source_path, accepts_webp):
+        if accepts_webp:
+            return 'webp'
+        return 'png' if self._source_info(source_path)[1] else 'jpeg'
+
+    def _cache_path(self, source_path, width, image_format):
+        st = os.stat(source_path)
+        digest = hashlib.sha256(f'{os.path.abspath(source_path)}:{st.st_mtime_ns}:{st.st_size}'.encode()).hexdigest()[:24]
+        return os.path.join(self.cache_folder, f'{digest}-{width}.{image_format}')
+
+    def derivative(self, source_path, width, accepts_webp, wait=True):
+        """Return (path, mimetype) of the derivative, rendering it if needed
+
+        ``width`` is rounded up to a standard width and capped at the source
+        width. With ``wait=False`` rendering is only scheduled.
+        """
+        width = next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+        width = min(width, self._source_info(source_path)[0])
+        image_format = self.choose_format(source_path, accepts_webp)
+        dest_path = self._cache_path(source_path, width, image_format)
+        hit = os.path.exists(dest_path)
+        if self.on_lookup:
+            self.on_lookup('images', hit)
+        if hit:
+            self.hits += 1
+            os.utime(dest_path)  # Mark as recently used
+            return dest_path, MIMETYPES[image_format]
+
+        self.misses += 1
+        submitted = False
+        with self._lock:
+            future = self._inflight.get(dest_path)
+            if future is None:
+                future = self._executor().submit(render_derivative, source_path, dest_path,
+                                                 width, image_format, self.quality)
+                self._inflight[dest_path] = future
+                submitted = True
+        if submitted:
+            future.add_done_callback(lambda f: self._finished(dest_path))
+        if wait:
+            future.result()
+        return dest_path, MIMETYPES[image_format]
+
+    def pregenerate(self, source_path):
+        """Schedule every standard size in both formats, without waiting"""
+        for width in self.widths_for(source_path):
+            for accepts_webp in (True, False):
+                self.derivative(source_path, width, accepts_webp, wait=False)
+
+    def _finished(self, dest_path):
+        with self._lock:
+            self._inflight.pop(dest_path, None)
+        self.trim()
+
+    def trim(self):
+        """Delete least recently used derivatives until the cache fits ``max_bytes``"""
+        entries = []
+        for name in os.listdir(self.cache_folder):
+            path = os.path.join(self.cache_folder, name)
+            if name.endswith('.tmp'):
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'name': 'images',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
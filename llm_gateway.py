@@ -0,0 +1,464 @@
+"""Shared gateway for every Gemini call made by the app.
+
+The gateway keeps one model handle per model name, coalesces identical
+prompts that are in flight at the same time into a single upstream call
+(single-flight), caps the number of upstream calls in flight, enforces a
+deadline on every call, stops calling upstream for a while after repeated
+failures (circuit breaker) and records latency stats per route.
+``StubBackend`` replaces Gemini for offline runs (``LLM_BACKEND=stub``).
+"""
+import hashlib
+import itertools
+import os
+import struct
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an upstream call does not finish within its deadline"""
+
+
+class LLMOverloadedError(Exception):
+    """Raised when no upstream slot frees up in time; retry after ``retry_after`` seconds"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMUnavailableError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` failures in a row and probes again after ``reset_timeout``
+
+    While open every call is refused. Once the cool-down has passed a single
+    probe call is let through (half-open): its success closes the circuit,
+    its failure opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            now = time.monotonic()
+            if self.state == 'open' and now - self._opened_at < self.reset_timeout:
+                return False
+            if self.state == 'half_open' and now - self._probe_started < self.reset_timeout:
+                return False  # A probe is already out
+            # Cool-down over (or the last probe never came back): let one call through
+            self.state = 'half_open'
+            self._probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opened += 1
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+    def as_dict(self):
+        return {'state': self.state, 'failures': self.failures, 'opened': self.opened}
+
+
+class GeminiBackend:
+    """Google Gemini backend with one cached ``GenerativeModel`` per model name
+
+    The SDK takes about half a second to import, so it is only imported and
+    configured by the first call rather than when the app starts.
+    """
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._genai = None
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _sdk(self):
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._genai = genai
+        return self._genai
+
+    def model(self, model_name):
+        model = self._models.get(model_name)
+        if model is None:
+            genai = self._sdk()
+            with self._lock:
+                model = self._models.setdefault(model_name, genai.GenerativeModel(model_name))
+        return model
+
+    def generate(self, model_name, prompt):
+        return self.model(model_name).generate_content(prompt).text
+
+    def stream(self, model_name, prompt):
+        for chunk in self.model(model_name).generate_content(prompt, stream=True):
+            yield chunk.text
+
+    def embed(self, model_name, texts):
+        genai = self._sdk()
+        return [genai.embed_content(model=model_name, content=text)['embedding'] for text in texts]
+
+
+class StubBackend:
+    """Deterministic offline backend with configurable latency and jitter"""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=0, responder=None, failure_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.responder = responder
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            fail = self.failure_rate and self._random.random() < self.failure_rate
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if fail:
+            time.sleep(delay)
+            raise RuntimeError('Stub upstream failure')
+        return delay
+
+    def _respond(self, model_name, prompt):
+        if self.responder:
+            return self.responder(prompt)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+        return f"[stub {model_name} {digest}] This is a placeholder response."
+
+    def generate(self, model_name, prompt):
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._respond(model_name, prompt)
+
+    def stream(self, model_name, prompt):
+        # Spread the latency over the chunks so the first one arrives early
+        delay = self._delay()
+        words = self._respond(model_name, prompt).split(' ')
+        for i, word in enumerate(words):
+            if delay:
+                time.sleep(delay / len(words))
+            yield word if i == 0 else ' ' + word
+
+    def embed(self, model_name, texts):
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        # Deterministic pseudo-random vectors, equal for equal texts
+        return [list(struct.unpack('<16h', hashlib.sha256(text.encode('utf-8')).digest())) for text in texts]
+
+
+class RouteStats:
+    """Call counters and a window of recent latencies for one route"""
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.short_circuited = 0
+        self.latencies = deque(maxlen=window)
+
+    def as_dict(self):
+        samples = sorted(self.latencies)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            'calls': self.calls,
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'short_circuited': self.short_circuited,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(samples[-1] * 1000, 2) if samples else 0.0
+        }
+
+
+class LLMGateway:
+    """Single entry point for LLM calls: shared handles, single-flight, deadlines
+
+    At most ``max_inflight`` upstream calls run at once. A call that cannot
+    get a slot within ``queue_timeout`` seconds fails fast with
+    ``LLMOverloadedError`` instead of tying up the request thread. If a slot
+    is held by a call past its caller's deadline, upstream is hanging rather
+    than busy: that counts as a failure for the circuit breaker and raises
+    ``LLMUnavailableError``, so callers fall back instead of shedding.
+    """
+
+    def __init__(self, backend, timeout=20.0, max_workers=8, default_model='gemini-pro',
+                 max_inflight=None, queue_timeout=0.5, breaker=None):
+        self.backend = backend
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.default_model = default_model
+        self.max_inflight = max_inflight or max_workers
+        self.queue_timeout = queue_timeout
+        self.max_workers = max_workers
+        self._tokens = itertools.count()
+        self._reset()
+        # Threads do not survive a fork (gunicorn --preload): a worker forked from a
+        # master that already made calls gets its own pool, slots and in-flight map
+        os.register_at_fork(after_in_child=self._reset)
+        self._stats = {}
+        self.on_call = None  # Optional callback(route, outcome, seconds=None), e.g. for metrics
+
+    def _reset(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm')
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._deadlines = {}  # Slot token -> deadline of the caller that took the slot
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _route_stats(self, route):
+        stats = self._stats.get(route)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(route, RouteStats())
+        return stats
+
+    def _observe(self, route, outcome, seconds=None):
+        if self.on_call:
+            self.on_call(route, outcome, seconds)
+
+    def _check_circuit(self, route, stats):
+        if not self.breaker.allow():
+            with self._lock:
+                stats.short_circuited += 1
+            self._observe(route, 'short_circuited')
+            raise LLMUnavailableError(f"LLM upstream is unavailable, not calling it for '{route}'")
+
+    def _record_outcome(self, outcome, elapsed):
+        # A call slower than the deadline counts as a failure even if it succeeded
+        if outcome == 'ok' and elapsed <= self.timeout:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _acquire_slot(self, route, stats, timeout):
+        """Take an upstream slot and return the token that releases it"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            now = time.monotonic()
+            with self._lock:
+                stats.rejected += 1
+                stalled = any(deadline < now for deadline in self._deadlines.values())
+            self._observe(route, 'rejected')
+            if stalled:
+                self.breaker.record_failure()
+                raise LLMUnavailableError(f"LLM upstream is not responding, no slot free for '{route}'")
+            raise LLMOverloadedError(f"Too many LLM calls in flight for '{route}'",
+                                     retry_after=max(1, round(self.timeout / 4)))
+        token = next(self._tokens)
+        with self._lock:
+            self._deadlines[token] = time.monotonic() + (self.timeout if timeout is None else timeout)
+        return token
+
+    def _release_slot(self, token):
+        with self._lock:
+            self._deadlines.pop(token, None)
+        self._slots.release()
+
+    def _call_upstream(self, call, route, stats, token):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = call()
+            outcome = 'ok'
+            return response
+        finally:
+            self._release_slot(token)
+            elapsed = time.perf_counter() - started
+            stats.latencies.append(elapsed)
+            self._record_outcome(outcome, elapsed)
+            self._observe(route, outcome, elapsed)
+
+    def generate(self, prompt, route='default', model=None, timeout=None):
+        """Return the response text for ``prompt``, waiting at most ``timeout`` seconds
+
+        Callers that ask for the same model and prompt while an upstream call
+        is already running share that call's result instead of starting another.
+        """
+        model_name = model or self.default_model
+        stats = self._route_stats(route)
+        key = (model_name, prompt)
+
+        with self._lock:
+            stats.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                stats.coalesced += 1
+        leader = future is None
+        if leader:
+            # Wait for a slot without holding the lock, then check again that
+            # nobody else started the same call in the meantime
+            self._check_circuit(route, stats)
+            token = self._acquire_slot(route, stats, timeout)
+            with self._lock:
+                future = self._inflight.get(key)
+                if future is None:
+                    stats.upstream_calls += 1
+                    future = self._executor.submit(self._call_upstream, partial(self.backend.generate, model_name, prompt),
+                                                   route, stats, token)
+                    self._inflight[key] = future
+                else:
+                    leader = False
+                    stats.coalesced += 1
+            if not leader:
+                self._release_slot(token)
+        if not leader:
+            self._observe(route, 'coalesced')
+        if leader:
+            # Registered outside the lock: it runs inline if the call already finished
+            future.add_done_callback(lambda f, key=key: self._forget(key, f))
+        return self._wait(future, route, stats, timeout, leader)
+
+    def embed(self, texts, route='embed', model='models/embedding-001', timeout=None):
+        """Return one embedding vector per text, from a single deadline-bound upstream call"""
+        stats = self._route_stats(route)
+        with self._lock:
+            stats.calls += 1
+        self._check_circuit(route, stats)
+        token = self._acquire_slot(route, stats, timeout)
+        with self._lock:
+            stats.upstream_calls += 1
+        future = self._executor.submit(self._call_upstream, partial(self.backend.embed, model, list(texts)),
+                                       route, stats, token)
+        return self._wait(future, route, stats, timeout, True)
+
+    def _wait(self, future, route, stats, timeout, leader):
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            stats.timeouts += 1
+            self._observe(route, 'timeout')
+            if leader:
+                # Don't wait for a hung call to finish before it counts against the circuit
+                self.breaker.record_failure()
+            raise LLMTimeoutError(f"LLM call for '{route}' timed out")
+        except Exception:
+            stats.errors += 1
+            raise
+
+    def stream(self, prompt, route='default', model=None, timeout=None):
+        """Return an iterator of response chunks that ends at an overall deadline
+
+        The upstream iterator runs on the gateway's pool and hands chunks over
+        through a queue, so a stalled stream still ends at the deadline. The
+        upstream slot is taken right away, so ``LLMOverloadedError`` is raised
+        here rather than from the iterator.
+        """
+        model_name = model or self.default_model
+        stats = self._route_stats(route)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        chunks = queue.Queue()
+        done = object()
+
+        def produce():
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                for chunk in self.backend.stream(model_name, prompt):
+                    chunks.put(chunk)
+                chunks.put(done)
+                outcome = 'ok'
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                self._release_slot(token)
+                elapsed = time.perf_counter() - started
+                stats.latencies.append(elapsed)
+                self._record_outcome(outcome, elapsed)
+                self._observe(route, outcome, elapsed)
+
+        with self._lock:
+            stats.calls += 1
+        self._check_circuit(route, stats)
+        token = self._acquire_slot(route, stats, timeout)
+        with self._lock:
+            stats.upstream_calls += 1
+        self._executor.submit(produce)
+        return self._drain(chunks, done, deadline, route, stats)
+
+    def _drain(self, chunks, done, deadline, route, stats):
+        while True:
+            try:
+                item = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                stats.timeouts += 1
+                self._observe(route, 'timeout')
+                self.breaker.record_failure()
+                raise LLMTimeoutError(f"LLM stream for '{route}' timed out")
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                stats.errors += 1
+                raise item
+            yield item
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self):
+        return {route: stats.as_dict() for route, stats in sorted(self._stats.items())}
+
+    def circuit(self):
+        return self.breaker.as_dict()
+
+
+def create_gateway():
+    """Build the gateway configured by the environment"""
+    if os.getenv('LLM_BACKEND', 'gemini') == 'stub':
+        backend = StubBackend(latency=float(os.getenv('STUB_LATENCY_MS', '0')) / 1000,
+                              jitter=float(os.getenv('STUB_JITTER_MS', '0')) / 1000,
+                              failure_rate=float(os.getenv('STUB_FAILURE_RATE', '0')))
+    else:
+        backend = GeminiBackend(os.getenv('GEMINI_API_KEY'))
+    return LLMGateway(backend,
+                      timeout=float(os.getenv('LLM_TIMEOUT', '20')),
+                      max_workers=int(os.getenv('LLM_MAX_WORKERS', '8')),
+                      max_inflight=int(os.getenv('LLM_MAX_INFLIGHT', '0')) or None,
+                      queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT', '0.5')),
+                      breaker=CircuitBreaker(failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', '3')),
+                                             reset_timeout=float(os.getenv('LLM_BREAKER_RESET', '30'))))
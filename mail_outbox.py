@@ -0,0 +1,251 @@
+"""Durable outbox for contact form emails.
+
+Messages are spooled as JSON files under ``<folder>/pending`` and delivered by
+a background thread that keeps one authenticated SMTP connection open across
+messages. A message is claimed by renaming it into ``sending/``, so several
+gunicorn workers can share one outbox without sending anything twice. Failed
+deliveries are retried with exponential backoff and end up in ``failed/``
+after ``max_attempts``. With a digest window set, messages that arrive close
+together are delivered as one digest email.
+
+For local testing point it at a throwaway SMTP server, for example
+``python -m aiosmtpd -n -l localhost:8025`` with ``SMTP_STARTTLS=0``.
+"""
+import json
+import os
+import smtplib
+import tempfile
+import threading
+import time
+import uuid
+from email.mime.text import MIMEText
+
+
+class MailOutbox:
+    """Spool directory of outgoing emails plus the thread that delivers them"""
+
+    def __init__(self, folder, smtp_server, smtp_port, sender_email, sender_password,
+                 recipient_email, starttls=True, digest_seconds=0, max_attempts=8,
+                 retry_delay=30, idle_timeout=60, stale_after=600):
+        self.folder = folder
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.recipient_email = recipient_email
+        self.starttls = starttls
+        self.digest_seconds = digest_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.stale_after = stale_after
+        self.sent = 0
+        self.failed = 0
+        self.on_send = None  # Optional callback(outcome, seconds, messages), e.g. for metrics
+        self._smtp = None
+        self._smtp_used_at = 0.0
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        for state in ('pending', 'sending', 'failed'):
+            os.makedirs(os.path.join(folder, state), exist_ok=True)
+
+    @property
+    def configured(self):
+        return bool(self.sender_email and self.smtp_server)
+
+    def _path(self, state, name=''):
+        return os.path.join(self.folder, state, name)
+
+    def _write(self, state, name, message):
+        fd, tmp_path = tempfile.mkstemp(dir=self._path(state), prefix='.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(message, f)
+        os.replace(tmp_path, self._path(state, name))
+
+    def enqueue(self, name, email, message):
+        """Spool a contact form submission and wake the sender"""
+        now = time.time()
+        item = {
+            'id': str(uuid.uuid4()),
+            'name': name,
+            'email': email,
+            'message': message,
+            'created_at': now,
+            'attempts': 0,
+            'next_attempt': now
+        }
+        self._write('pending', f"{int(now * 1000)}-{item['id']}.json", item)
+        self.start()
+        self._wakeup.set()
+        return item['id']
+
+    def start(self):
+        """Start the sender thread once per process (safe to call on every request)"""
+        if not self.configured:
+            return
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._smtp = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='mail-outbox', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self._requeue_stale()
+        while True:
+            try:
+                delay = self.flush()
+            except Exception as e:
+                print(f"Mail outbox error: {str(e)}")
+                delay = self.retry_delay
+            if self._smtp is not None and time.monotonic() - self._smtp_used_at > self.idle_timeout:
+                self._disconnect()
+            self._wakeup.wait(timeout=min(delay, self.idle_timeout))
+            self._wakeup.clear()
+
+    def _requeue_stale(self):
+        # Messages left in sending/ by a worker that died mid-delivery
+        cutoff = time.time() - self.stale_after
+        for name in os.listdir(self._path('sending')):
+            path = self._path('sending', name)
+            try:
+                if name.endswith('.json') and os.path.getmtime(path) < cutoff:
+                    os.rename(path, self._path('pending', name))
+            except FileNotFoundError:
+                pass
+
+    def _due(self):
+        now = time.time()
+        due, next_wakeup = [], 3600.0
+        for name in sorted(os.listdir(self._path('pending'))):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(self._path('pending', name)) as f:
+                    item = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            if item['next_attempt'] <= now:
+                due.append((name, item))
+            else:
+                next_wakeup = min(next_wakeup, item['next_attempt'] - now)
+        return due, next_wakeup
+
+    def _claim(self, names):
+        claimed = []
+        for name in names:
+            try:
+                os.rename(self._path('pending', name), self._path('sending', name))
+                claimed.append(name)
+            except FileNotFoundError:
+                pass  # Another worker got it first
+        return claimed
+
+    def flush(self):
+        """Deliver every due message and return seconds until the next one is due"""
+        due, next_wakeup = self._due()
+        if not due:
+            return next_wakeup
+        if self.digest_seconds:
+            oldest = min(item['created_at'] for _, item in due)
+            wait = oldest + self.digest_seconds - time.time()
+            if wait > 0:
+                return min(wait, next_wakeup)
+            batches = [due]
+        else:
+            batches = [[entry] for entry in due]
+
+        for batch in batches:
+            items = dict(batch)
+            claimed = self._claim(list(items))
+            if not claimed:
+                continue
+            try:
+                self._send([items[name] for name in claimed])
+                for name in claimed:
+                    os.remove(self._path('sending', name))
+                self.sent += len(claimed)
+            except Exception as e:
+                print(f"Failed to send email: {str(e)}")
+                self._disconnect()
+                for name in claimed:
+                    self._retry(name, items[name])
+        return min(next_wakeup, self.retry_delay)
+
+    def _retry(self, name, item):
+        item['attempts'] += 1
+        if item['attempts'] >= self.max_attempts:
+            self._write('failed', name, item)
+            self.failed += 1
+        else:
+            item['next_attempt'] = time.time() + self.retry_delay * 2 ** (item['attempts'] - 1)
+            self._write('pending', name, item)
+        os.remove(self._path('sending', name))
+
+    def build_message(self, items):
+        if len(items) == 1:
+            item = items[0]
+            msg = MIMEText(f"""
+        You have received a new message from your portfolio website!
+
+        Name: {item['name']}
+        Email: {item['email']}
+
+        Message:
+        {item['message']}
+
+        ---
+        This message was sent from your portfolio contact form.
+        Reply directly to {item['email']} to respond to the sender.
+        """, 'plain')
+            msg['Subject'] = f"New Contact Form Submission from {item['name']}"
+            msg['Reply-To'] = item['email']
+        else:
+            sections = '\n'.join(
+                f"{i}. {item['name']} <{item['email']}>\n{item['message']}\n"
+                for i, item in enumerate(items, 1))
+            msg = MIMEText(f"You have received {len(items)} new messages from your portfolio website!\n\n"
+                           f"{sections}\n---\nThis digest was sent from your portfolio contact form.\n", 'plain')
+            msg['Subject'] = f"{len(items)} New Contact Form Submissions"
+        msg['From'] = self.sender_email
+        msg['To'] = self.recipient_email
+        return msg
+
+    def _connection(self):
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+            if self.starttls:
+                smtp.starttls()
+            if self.sender_password:
+                smtp.login(self.sender_email, self.sender_password)
+            self._smtp = smtp
+        return self._smtp
+
+    def _send(self, items):
+        msg = self.build_message(items).as_string()
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            try:
+                self._connection().sendmail(self.sender_email, [self.recipient_email], msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the idle connection, reconnect once
+                self._smtp = None
+                self._connection().sendmail(self.sender_email, [self.recipient_email], msg)
+            outcome = 'ok'
+        finally:
+            if self.on_send:
+                self.on_send(outcome, time.perf_counter() - started, len(items))
+        self._smtp_used_at = time.monotonic()
+
+    def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                pass
@@ -0,0 +1,96 @@
+"""Prometheus metrics for requests, LLM calls, SMTP sends, caches and uploads.
+
+Under gunicorn, ``gunicorn.conf.py`` sets ``PROMETHEUS_MULTIPROC_DIR`` so
+every worker writes its samples to memory-mapped files in that folder and a
+scrape of any worker reports the totals of all of them. Without the
+variable (``flask run``) the metrics are kept in process. Without
+prometheus_client every method is a no-op.
+"""
+import os
+
+try:
+    import prometheus_client
+except ImportError:  # prometheus_client is optional, metrics are just not collected
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+
+class Metrics:
+    """The app's metric families, with one method per thing that is measured"""
+
+    def __init__(self):
+        self.enabled = prometheus_client is not None
+        if not self.enabled:
+            return
+        from prometheus_client import Counter, Gauge, Histogram
+        self.multiprocess = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+        if self.multiprocess:
+            os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+        self.requests = Counter('http_requests_total', 'HTTP requests by endpoint and status',
+                                ['endpoint', 'method', 'status'])
+        self.request_seconds = Histogram('http_request_duration_seconds', 'Time to produce a response',
+                                         ['endpoint', 'method'], buckets=LATENCY_BUCKETS)
+        self.in_flight = Gauge('http_requests_in_flight', 'Requests being handled',
+                               ['endpoint'], multiprocess_mode='livesum')
+        self.llm_calls = Counter('llm_calls_total', 'LLM gateway calls by outcome '
+                                 '(ok, error, timeout, rejected, coalesced, short_circuited)', ['route', 'outcome'])
+        self.llm_seconds = Histogram('llm_upstream_duration_seconds', 'Duration of upstream Gemini calls',
+                                     ['route', 'outcome'], buckets=LATENCY_BUCKETS)
+        self.smtp_sends = Counter('smtp_sends_total', 'SMTP deliveries by outcome', ['outcome'])
+        self.smtp_messages = Counter('smtp_messages_total', 'Contact messages delivered by SMTP')
+        self.smtp_seconds = Histogram('smtp_send_duration_seconds', 'Duration of SMTP deliveries',
+                                      buckets=LATENCY_BUCKETS)
+        self.cache_lookups = Counter('cache_lookups_total', 'Cache lookups by result', ['cache', 'result'])
+        self.upload_bytes = Counter('upload_bytes_total', 'Bytes received by the upload endpoints', ['kind'])
+        self.startup_seconds = Gauge('app_startup_seconds', 'Import, warmup and first request durations '
+                                     'per worker', ['phase'], multiprocess_mode='liveall')
+
+    def request_started(self, endpoint):
+        if self.enabled:
+            self.in_flight.labels(endpoint).inc()
+
+    def request_finished(self, endpoint, method, status, seconds):
+        if self.enabled:
+            self.requests.labels(endpoint, method, str(status)).inc()
+            self.request_seconds.labels(endpoint, method).observe(seconds)
+
+    def request_closed(self, endpoint):
+        if self.enabled:
+            self.in_flight.labels(endpoint).dec()
+
+    def llm_call(self, route, outcome, seconds=None):
+        if self.enabled:
+            self.llm_calls.labels(route, outcome).inc()
+            if seconds is not None:
+                self.llm_seconds.labels(route, outcome).observe(seconds)
+
+    def smtp_send(self, outcome, seconds, messages):
+        if self.enabled:
+            self.smtp_sends.labels(outcome).inc()
+            self.smtp_seconds.observe(seconds)
+            if outcome == 'ok':
+                self.smtp_messages.inc(messages)
+
+    def cache_lookup(self, cache, hit):
+        if self.enabled:
+            self.cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+    def upload(self, kind, size):
+        if self.enabled:
+            self.upload_bytes.labels(kind).inc(size)
+
+    def startup(self, phase, seconds):
+        if self.enabled:
+            self.startup_seconds.labels(phase).set(seconds)
+
+    def render(self):
+        """Return ``(body, content_type)`` in the Prometheus text format"""
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, REGISTRY, generate_latest
+        registry = REGISTRY
+        if self.multiprocess:
+            from prometheus_client import multiprocess
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
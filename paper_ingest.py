@@ -0,0 +1,200 @@
+"""Background text extraction for uploaded papers.
+
+A thread in each worker process looks for paper records that have not been
+ingested yet and hands their PDFs to a small process pool, which extracts
+the full text, the page count and an excerpt of the first page. The text is
+kept in ``<text_folder>/<sha256>.txt`` next to a ``.json`` summary, and the
+summary fields are merged into the paper record, so identical files are
+only parsed once. A ``.claim`` file makes sure only one worker parses each
+file. Without pypdf nothing is ingested and the backlog waits until it is
+installed.
+"""
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from claims import claim, release
+from content_store import PAPER_TYPE
+from uploads import file_digest
+
+# pypdf is optional, papers are just not ingested without it. Only the pool
+# processes that parse PDFs import it
+PYPDF_AVAILABLE = importlib.util.find_spec('pypdf') is not None
+
+SUMMARY_FIELDS = ('page_count', 'excerpt', 'text_chars')
+
+
+def extract_pdf(pdf_path, text_path, excerpt_chars):
+    """Write the text of a PDF to ``text_path`` and return its summary (runs in a worker process)"""
+    from pypdf import PdfReader
+    reader = PdfReader(pdf_path)
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or '')
+        except Exception:
+            pages.append('')  # One broken page should not lose the rest
+    text = '\f'.join(pages)
+    tmp_path = f'{text_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, text_path)
+    first_page = re.sub(r'\s+', ' ', pages[0] if pages else '').strip()
+    excerpt = first_page[:excerpt_chars].rsplit(' ', 1)[0] + '...' if len(first_page) > excerpt_chars else first_page
+    return {'page_count': len(pages), 'excerpt': excerpt, 'text_chars': len(text)}
+
+
+class PaperIngestor:
+    """Finds papers that still need ingesting and processes them in the background"""
+
+    def __init__(self, store, papers_folder, text_folder, workers=1, excerpt_chars=400,
+                 poll_interval=300, retry_interval=10, stale_after=600):
+        self.store = store
+        self.papers_folder = papers_folder
+        self.text_folder = text_folder
+        self.workers = workers
+        self.excerpt_chars = excerpt_chars
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.stale_after = stale_after
+        self.ingested = 0
+        self.failed = 0
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        os.makedirs(text_folder, exist_ok=True)
+
+    @property
+    def available(self):
+        return PYPDF_AVAILABLE
+
+    def _path(self, digest, suffix):
+        return os.path.join(self.text_folder, f'{digest}{suffix}')
+
+    def start(self):
+        """Start the ingest thread once per process (safe to call on every request)"""
+        if not self.available:
+            return
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='paper-ingest', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Ask the ingest thread to look for new papers now"""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers,
+                                   mp_context=multiprocessing.get_context('spawn'))
+        while True:
+            self._wakeup.clear()
+            delay = self.poll_interval
+            try:
+                if self.ingest_pending(pool):
+                    delay = self.retry_interval  # Pick up the other worker's result soon
+            except Exception as e:
+                print(f"Paper ingest error: {str(e)}")
+            self._wakeup.wait(timeout=delay)
+
+    def pending(self):
+        return [paper for paper in self.store.list(PAPER_TYPE) if not paper.get('ingest_status')]
+
+    def ingest_pending(self, pool):
+        """Ingest the current backlog and return True if papers were left to another worker"""
+        jobs = {}  # digest -> (future, papers with that content)
+        deferred = False
+        for paper in self.pending():
+            pdf_path = os.path.join(self.papers_folder, paper.get('filename', ''))
+            if not os.path.isfile(pdf_path):
+                self.store.update(paper['id'], {'ingest_status': 'missing'})
+                continue
+            digest = paper.get('sha256') or file_digest(pdf_path)
+            summary = self._summary(digest)
+            if summary is not None:
+                self._record(paper, digest, summary)
+            elif digest in jobs:
+                jobs[digest][1].append(paper)
+            elif self._claim(digest):
+                future = pool.submit(extract_pdf, pdf_path, self._path(digest, '.txt'), self.excerpt_chars)
+                jobs[digest] = (future, [paper])
+            else:
+                deferred = True  # Another worker is parsing it
+
+        futures = {future: (digest, papers) for digest, (future, papers) in jobs.items()}
+        for future in as_completed(futures):
+            digest, papers = futures[future]
+            try:
+                summary = dict(future.result(), status='done')
+            except Exception as e:
+                print(f"Failed to ingest paper {papers[0].get('filename')}: {str(e)}")
+                summary = {'status': 'failed', 'error': str(e)[:200]}
+            self._write_summary(digest, summary)
+            for paper in papers:
+                self._record(paper, digest, summary)
+        return deferred
+
+    def _claim(self, digest):
+        return claim(self._path(digest, '.claim'), self.stale_after)
+
+    def _summary(self, digest):
+        try:
+            with open(self._path(digest, '.json'), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_summary(self, digest, summary):
+        tmp_path = self._path(digest, f'.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, self._path(digest, '.json'))
+        release(self._path(digest, '.claim'))
+
+    def _record(self, paper, digest, summary):
+        fields = {key: summary[key] for key in SUMMARY_FIELDS if key in summary}
+        fields.update(sha256=digest, ingest_status=summary['status'],
+                      ingested_at=datetime.now().isoformat())
+        if self.store.update(paper['id'], fields) is None:
+            return  # Deleted while it was being parsed
+        if summary['status'] == 'done':
+            self.ingested += 1
+        else:
+            self.failed += 1
+
+    def text(self, paper):
+        """Extracted text of an ingested paper ('' if there is none yet)"""
+        digest = paper.get('sha256')
+        if not digest or paper.get('ingest_status') != 'done':
+            return ''
+        try:
+            with open(self._path(digest, '.txt'), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return ''
+
+    def forget(self, digest):
+        """Delete the stored text of a file that is gone"""
+        for suffix in ('.txt', '.json', '.claim'):
+            try:
+                os.remove(self._path(digest, suffix))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {
+            'available': self.available,
+            'pending': len(self.pending()),
+            'ingested': self.ingested,
+            'failed': self.failed
+        }
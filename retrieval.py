@@ -0,0 +1,165 @@
+"""Vector retrieval over the site's content for grounding the chatbot.
+
+Content is split into chunks, embedded into a NumPy matrix of unit vectors
+and queried by cosine similarity. NumPy is imported on first use, so
+workers that never answer a chatbot question do not pay for it. Embedders
+are pluggable: ``HashingEmbedder`` is local and deterministic (no network,
+used for tests and offline runs) and ``GeminiEmbedder`` uses Gemini's
+embedding model through the LLM gateway.
+"""
+import hashlib
+import re
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+
+from llm_gateway import LLMTimeoutError
+from search_index import tokenize
+
+
+def chunk_text(text, max_words=120, overlap=20):
+    """Split ``text`` into overlapping windows of at most ``max_words`` words"""
+    words = text.split()
+    if len(words) <= max_words:
+        return [' '.join(words)] if words else []
+    step = max_words - overlap
+    return [' '.join(words[start:start + max_words]) for start in range(0, len(words) - overlap, step)]
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style', 'head'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'head') and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    """Visible text of an HTML document, whitespace collapsed"""
+    parser = _TextExtractor()
+    parser.feed(html)
+    return re.sub(r'\s+', ' ', ' '.join(parser.parts)).strip()
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder over word unigrams and bigrams"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def embed(self, texts, timeout=None):
+        import numpy as np
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode('utf-8'))
+                matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return matrix
+
+
+class GeminiEmbedder:
+    """Gemini embedding model, called through the LLM gateway
+
+    Goes through the gateway so embedding calls share its circuit breaker and
+    in-flight cap; texts are sent ``batch_size`` per call, all batches within
+    one ``timeout`` (the gateway's default when None).
+    """
+
+    def __init__(self, gateway, model='models/embedding-001', batch_size=32):
+        self.gateway = gateway
+        self.model = model
+        self.batch_size = batch_size
+
+    def embed(self, texts, timeout=None):
+        import numpy as np
+        deadline = time.monotonic() + (self.gateway.timeout if timeout is None else timeout)
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError(f'Embedding {len(texts)} texts ran out of time')
+            vectors.extend(self.gateway.embed(texts[start:start + self.batch_size], model=self.model,
+                                              timeout=remaining))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(matrix):
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """Top-k cosine similarity search over embedded chunks
+
+    Embeddings are cached by chunk text, so rebuilding after a content change
+    only embeds the chunks that are new or changed. They are cached batch by
+    batch, so a build that runs out of time resumes where it stopped.
+    """
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self._chunks = []
+        self._matrix = None
+        self._embeddings = {}
+        self._lock = threading.Lock()
+        self.on_lookup = None  # Optional callback(name, hit) per embedded chunk
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def build(self, chunks, timeout=None):
+        """Replace the indexed chunks (dicts with at least a ``text`` key), embedding within ``timeout``"""
+        keys = [hashlib.sha256(chunk['text'].encode('utf-8')).hexdigest() for chunk in chunks]
+        missing = [i for i, key in enumerate(keys) if key not in self._embeddings]
+        if self.on_lookup:
+            for i, key in enumerate(keys):
+                self.on_lookup('embeddings', key in self._embeddings)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        step = getattr(self.embedder, 'batch_size', None) or len(missing)
+        for start in range(0, len(missing), step):
+            batch = missing[start:start + step]
+            left = None if deadline is None else deadline - time.monotonic()
+            vectors = _normalize(self.embedder.embed([chunks[i]['text'] for i in batch], timeout=left))
+            for i, vector in zip(batch, vectors):
+                self._embeddings[keys[i]] = vector
+        import numpy as np
+        self._embeddings = {key: self._embeddings[key] for key in keys}
+        matrix = np.vstack([self._embeddings[key] for key in keys]) if keys else None
+        with self._lock:
+            self._chunks, self._matrix = list(chunks), matrix
+
+    def search(self, query, k=4, min_score=0.0, timeout=None):
+        """Return up to ``k`` ``(score, chunk)`` pairs, most similar first"""
+        with self._lock:
+            chunks, matrix = self._chunks, self._matrix
+        if matrix is None or not query.strip():
+            return []
+        import numpy as np
+        vector = _normalize(self.embedder.embed([query], timeout=timeout))[0]
+        scores = matrix @ vector
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), chunks[i]) for i in top if scores[i] > min_score]
+
+
+def create_embedder(name, gateway=None):
+    if name == 'gemini':
+        return GeminiEmbedder(gateway)
+    return HashingEmbedder()
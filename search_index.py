@@ -0,0 +1,96 @@
+"""In-memory inverted index with BM25 ranking for the site search."""
+import math
+import re
+import threading
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning in a portfolio search
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'his',
+    'in', 'is', 'it', 'me', 'of', 'on', 'or', 'show', 'that', 'the', 'to', 'what',
+    'with', 'which', 'who', 'does', 'did', 'do', 'about', 'any', 'some'
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens without stop words"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class SearchIndex:
+    """Inverted index over small text documents, ranked with Okapi BM25
+
+    Documents can be added, replaced and removed one at a time, so content
+    changes only touch the postings of the affected document.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {doc_id: term frequency}
+        self._doc_terms = {}  # doc_id -> Counter of terms
+        self._doc_lengths = {}
+        self._payloads = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id, text, payload):
+        """Index ``text`` under ``doc_id``, replacing any previous version"""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove(doc_id)
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+            self._doc_terms[doc_id] = terms
+            self._payloads[doc_id] = payload
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+
+    def remove(self, doc_id):
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            del self._payloads[doc_id]
+            self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def doc_ids(self):
+        with self._lock:
+            return list(self._doc_terms)
+
+    def payload(self, doc_id):
+        return self._payloads.get(doc_id)
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` ``(score, payload)`` pairs, best first"""
+        query_terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count or not query_terms:
+                return []
+            average_length = self._total_length / doc_count
+            scores = Counter()
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length = self._doc_lengths[doc_id]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            return [(round(score, 4), self._payloads[doc_id])
+                    for doc_id, score in scores.most_common(limit)]
@@ -0,0 +1,136 @@
+"""Incremental export of the site into a static folder for GitHub Pages.
+
+Pages are rendered through the Flask app with the test client, in parallel,
+and static files are copied from wherever the app serves them. Every file
+the exporter writes is recorded in a manifest with its SHA-256, so a later
+export only rewrites outputs whose content changed and deletes the outputs
+it no longer produces. Files in the output folder that the exporter did not
+write itself are never touched.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from uploads import file_digest
+
+MANIFEST_NAME = '.export-manifest.json'
+
+
+class SiteExporter:
+    """Writes rendered pages and copied files into ``out_dir``, skipping unchanged ones"""
+
+    def __init__(self, app, out_dir, base_path='', workers=4):
+        self.app = app
+        self.out_dir = out_dir
+        self.base_path = base_path.rstrip('/')
+        self.workers = workers
+        self.manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self, manifest):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def render(self, url):
+        """Body of ``url`` as served under ``base_path``"""
+        with self.app.test_client() as client:
+            response = client.get(url, base_url=f'http://localhost{self.base_path}/')
+            if response.status_code != 200:
+                raise RuntimeError(f'{url} returned {response.status_code}')
+            return response.get_data()
+
+    def _write(self, rel_path, content=None, source=None):
+        dest = os.path.join(self.out_dir, rel_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp_path = f'{dest}.{os.getpid()}.tmp'
+        if content is None:
+            with open(source, 'rb') as src, open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: src.read(64 * 1024), b''):
+                    f.write(chunk)
+        else:
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+        os.replace(tmp_path, dest)
+
+    def export(self, pages, files):
+        """Export ``pages`` ((url, rel_path) pairs) and ``files`` ((source_path, rel_path) pairs)
+
+        Returns a dict with the written, unchanged and removed output paths.
+        """
+        previous = self._load_manifest()
+        manifest = {}
+        result = {'written': [], 'unchanged': [], 'removed': []}
+
+        def changed(rel_path, digest):
+            if previous.get(rel_path, {}).get('sha256') == digest:
+                return not os.path.exists(os.path.join(self.out_dir, rel_path))
+            return True
+
+        def export_page(page):
+            url, rel_path = page
+            content = self.render(url)
+            digest = hashlib.sha256(content).hexdigest()
+            if changed(rel_path, digest):
+                self._write(rel_path, content=content)
+                return rel_path, {'sha256': digest}, True
+            return rel_path, {'sha256': digest}, False
+
+        def export_file(item):
+            source, rel_path = item
+            st = os.stat(source)
+            stamp = [st.st_mtime_ns, st.st_size]
+            entry = previous.get(rel_path, {})
+            # Only hash sources that were touched since the last export
+            digest = entry['sha256'] if entry.get('source') == stamp else file_digest(source)
+            if changed(rel_path, digest):
+                self._write(rel_path, source=source)
+                return rel_path, {'sha256': digest, 'source': stamp}, True
+            return rel_path, {'sha256': digest, 'source': stamp}, False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            outcomes = list(pool.map(export_page, pages)) + list(pool.map(export_file, files))
+        for rel_path, entry, written in outcomes:
+            manifest[rel_path] = entry
+            result['written' if written else 'unchanged'].append(rel_path)
+
+        for rel_path in sorted(set(previous) - set(manifest)):
+            try:
+                os.remove(os.path.join(self.out_dir, rel_path))
+            except FileNotFoundError:
+                pass
+            result['removed'].append(rel_path)
+
+        self._save_manifest(manifest)
+        return result
+
+
+def collect_files(folder, prefix, out_dir, skip=()):
+    """(source_path, rel_path) pairs for every file under ``folder``
+
+    Folders that already are the export target (local uploads are stored
+    straight into ``docs/``) are left out, as are the ``skip`` subfolders.
+    """
+    files = []
+    if not os.path.isdir(folder):
+        return files
+    target = os.path.abspath(os.path.join(out_dir, prefix))
+    if os.path.abspath(folder) == target:
+        return files
+    for root, dirs, filenames in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if os.path.relpath(os.path.join(root, d), folder) not in skip)
+        for filename in sorted(filenames):
+            if filename.startswith('.') or filename.endswith('.tmp'):
+                continue
+            source = os.path.join(root, filename)
+            rel_path = os.path.relpath(source, folder).replace(os.sep, '/')
+            files.append((source, f'{prefix}/{rel_path}'))
+    return files
@@ -91,7 +91,106 @@ document.addEventListener('DOMContentLoaded', function() {
         // Show typing indicator
         addTypingIndicator();
         
-        // Call API to get response
+        // Stream the response, falling back to the JSON endpoint if streaming is unavailable
+        streamResponse(message).catch(error => {
+            if (error.partial) {
+                // Part of the answer is already on screen
+                console.error('Error:', error);
+                return;
+            }
+            if (error.retryAfter) {
+                // The server is shedding load, asking the other endpoint would only add to it
+                removeTypingIndicator();
+                addBusyMessage(error.retryAfter);
+                return;
+            }
+            console.warn('Streaming unavailable, falling back:', error);
+            fetchResponse(message);
+        });
+    }
+    
+    // 429 and 503 mean the server is busy; returns the seconds to wait, or 0 for other statuses
+    function busyRetryAfter(response) {
+        if (response.status !== 429 && response.status !== 503) {
+            return 0;
+        }
+        return parseInt(response.headers.get('Retry-After'), 10) || 5;
+    }
+    
+    function addBusyMessage(seconds) {
+        addMessage(`I'm answering a lot of questions right now. Please try again in ${seconds} seconds.`, 'bot');
+    }
+    
+    function streamResponse(message) {
+        return fetch('/api/chatbot/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+            },
+            body: JSON.stringify({ message: message }),
+        })
+        .then(response => {
+            if (!response.ok || !response.body || !window.TextDecoder) {
+                const error = new Error(`Streaming request failed (${response.status})`);
+                error.retryAfter = busyRetryAfter(response);
+                throw error;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let paragraph = null;
+            
+            function handleFrame(frame) {
+                let event = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        event = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        data += line.slice(5).trim();
+                    }
+                });
+                const payload = data ? JSON.parse(data) : {};
+                
+                if (event === 'error') {
+                    const error = new Error(payload.error || 'Streaming error');
+                    error.partial = paragraph !== null;
+                    throw error;
+                }
+                if (event === 'message' && payload.text) {
+                    // Replace the typing indicator with the message on the first chunk
+                    if (paragraph === null) {
+                        removeTypingIndicator();
+                        paragraph = addMessage('', 'bot');
+                    }
+                    paragraph.textContent += payload.text;
+                    chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+                }
+            }
+            
+            function read() {
+                return reader.read().then(({ done, value }) => {
+                    if (done) {
+                        if (paragraph === null) {
+                            throw new Error('Empty stream');
+                        }
+                        return;
+                    }
+                    buffer += decoder.decode(value, { stream: true });
+                    const frames = buffer.split('\n\n');
+                    buffer = frames.pop();
+                    frames.filter(frame => frame.trim()).forEach(handleFrame);
+                    return read();
+                });
+            }
+            
+            return read();
+        });
+    }
+    
+    function fetchResponse(message) {
         fetch('/api/chatbot', {
             method: 'POST',
             headers: {
@@ -99,12 +198,17 @@ document.addEventListener('DOMContentLoaded', function() {
             },
             body: JSON.stringify({ message: message }),
         })
-        .then(response => response.json())
+        .then(response => response.json().then(data => {
+            data.retryAfter = busyRetryAfter(response);
+            return data;
+        }))
         .then(data => {
             // Remove typing indicator
             removeTypingIndicator();
             
-            if (data.success) {
+            if (data.retryAfter) {
+                addBusyMessage(data.retryAfter);
+            } else if (data.success) {
                 // Add bot response
                 addMessage(data.response, 'bot');
             } else {
@@ -140,6 +244,8 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Scroll to bottom
         chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+        
+        return messageParagraph;
     }
     
     function addTypingIndicator() {
@@ -3,6 +3,12 @@
 document.addEventListener('DOMContentLoaded', function() {
     // Initialize UI elements
     initNavigation();
+    
+    // Blog posts share the layout but not the home page sections
+    if (!document.getElementById('typewriter-text')) {
+        return;
+    }
+    
     initTypewriter();
     initSkillsTabs();
     initProjectFilters();
@@ -55,9 +61,14 @@ function initNavigation() {
     // Smooth scrolling for navigation links
     navLinks.forEach(link => {
         link.addEventListener('click', function(e) {
+            const targetId = this.getAttribute('href');
+            
+            // Links to the home page from other pages navigate normally
+            if (!targetId.startsWith('#')) {
+                return;
+            }
             e.preventDefault();
             
-            const targetId = this.getAttribute('href');
             const targetElement = document.querySelector(targetId);
             
             if (targetElement) {
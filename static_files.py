@@ -0,0 +1,149 @@
+"""Static file delivery with precompressed variants, Range requests and proxy offload.
+
+``precompress`` writes Brotli (``.br``, when the brotli package is
+installed) and gzip (``.gz``) variants of a folder's compressible files
+ahead of time; ``flask build-assets`` runs it. A variant carries the
+modification time of its source, so a source edited after the build is
+served uncompressed until the next build instead of stale.
+
+``StaticFiles`` serves one folder. It picks the best variant the client
+accepts, answers conditional and Range requests (PDF viewers fetch pages
+as byte ranges), and sets the cache lifetime of the folder. With
+``offload`` set, files served as they are on disk only get their headers
+from the app and the transfer is left to the front proxy: ``x-sendfile``
+(Apache, lighttpd) gets the file's path and ``x-accel-redirect`` (nginx) a
+URL under ``offload_prefix`` that an internal location maps to the folder.
+The proxy then also handles the Range requests.
+"""
+import gzip
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, only gzip variants are written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.html', '.txt', '.xml', '.ico'}
+# Best first; each coding's variant is stored as <file><suffix>
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+OFFLOAD_MODES = ('x-sendfile', 'x-accel-redirect')
+
+
+def compress(encoding, data):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress(folder, variants_folder, min_size=1024, skip=()):
+    """Write missing or outdated variants of the compressible files in ``folder``; returns how many
+
+    ``skip`` lists subfolders of ``folder`` to leave out. Variants that would
+    not save at least a tenth of the size are not kept.
+    """
+    encodings = [(encoding, suffix) for encoding, suffix in ENCODINGS if encoding != 'br' or brotli]
+    written = 0
+    for root, dirs, filenames in os.walk(folder):
+        dirs[:] = [d for d in dirs if os.path.relpath(os.path.join(root, d), folder) not in skip]
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            source = os.path.join(root, filename)
+            stat = os.stat(source)
+            if stat.st_size < min_size:
+                continue
+            rel_path = os.path.relpath(source, folder)
+            data = None
+            for encoding, suffix in encodings:
+                dest = os.path.join(variants_folder, rel_path + suffix)
+                if _is_variant_of(dest, stat):
+                    continue
+                if data is None:
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                compressed = compress(encoding, data)
+                if len(compressed) > len(data) * 0.9:
+                    if os.path.exists(dest):
+                        os.remove(dest)
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                tmp_path = f'{dest}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(compressed)
+                os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                os.replace(tmp_path, dest)
+                written += 1
+    return written
+
+
+def _is_variant_of(path, source_stat):
+    try:
+        return os.stat(path).st_mtime_ns == source_stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+class StaticFiles:
+    """Serves the files of ``folder``, see the module docstring"""
+
+    def __init__(self, folder, variants_folder=None, max_age=None, immutable=False, private=(),
+                 offload=None, offload_prefix=None):
+        if offload and offload not in OFFLOAD_MODES:
+            raise ValueError(f'Unknown offload mode: {offload}')
+        self.folder = folder
+        self.variants_folder = variants_folder
+        self.max_age = max_age
+        self.immutable = immutable
+        self.private = set(private)  # Top-level subfolders that are never served
+        self.offload = offload or None
+        self.offload_prefix = (offload_prefix or '').rstrip('/')
+
+    def _variant(self, filename, source_stat):
+        """``(path, encoding)`` of the best variant the client accepts, or ``(None, None)``"""
+        if not self.variants_folder or 'Range' in request.headers:
+            return None, None  # Ranges are served from the file itself
+        for encoding, suffix in ENCODINGS:
+            if request.accept_encodings[encoding]:
+                path = safe_join(self.variants_folder, filename + suffix)
+                if path and _is_variant_of(path, source_stat):
+                    return path, encoding
+        return None, None
+
+    def _send(self, path, mimetype, environ, use_x_sendfile=False):
+        return send_file(path, environ, mimetype=mimetype, conditional=True, max_age=self.max_age,
+                         use_x_sendfile=use_x_sendfile, response_class=current_app.response_class,
+                         _root_path=current_app.root_path)
+
+    def serve(self, filename):
+        path = safe_join(self.folder, filename)
+        if not path or filename.split('/', 1)[0] in self.private or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        variant, encoding = self._variant(filename, os.stat(path))
+        if variant:
+            response = self._send(variant, mimetype, request.environ)
+            response.headers['Content-Encoding'] = encoding
+        elif self.offload:
+            # The proxy answers the Range, so the app only checks the validators
+            environ = {k: v for k, v in request.environ.items() if k not in ('HTTP_RANGE', 'HTTP_IF_RANGE')}
+            response = self._send(os.path.abspath(path), mimetype, environ, use_x_sendfile=True)
+            if self.offload == 'x-accel-redirect':
+                del response.headers['X-Sendfile']
+                response.headers['X-Accel-Redirect'] = f'{self.offload_prefix}/{quote(filename)}'
+        else:
+            response = self._send(path, mimetype, request.environ)
+        if not variant:
+            # Werkzeug only sets it on 206 responses; viewers look for it on the first one
+            response.headers['Accept-Ranges'] = 'bytes'
+        if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            response.vary.add('Accept-Encoding')
+        if self.max_age:
+            response.cache_control.public = True
+            response.cache_control.immutable = self.immutable or None
+        return response
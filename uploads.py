@@ -0,0 +1,106 @@
+"""Streaming, content-addressed storage for uploaded files.
+
+``HashingRequest`` makes werkzeug write every uploaded file straight to a
+temporary file in fixed-size chunks, as it parses the request body, and
+computes the file's SHA-256 along the way, so an upload never sits in memory
+and is never copied a second time. ``store_upload`` then files it under
+``<sha256><ext>``: if that name already exists the temporary file is simply
+dropped, so re-uploading the same file costs nothing extra on disk.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from flask import Request
+
+CHUNK_SIZE = 64 * 1024
+
+
+class HashingSpool:
+    """Writable temporary file that hashes everything written to it"""
+
+    def __init__(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=folder, prefix='.upload-', suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb+')
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def commit(self, dest_path):
+        """Move the spooled file to ``dest_path`` (unless it already exists)"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if os.path.exists(dest_path):
+            self.discard()
+            return False
+        try:
+            os.replace(self.path, dest_path)
+        except OSError:
+            # Spool and destination are on different filesystems
+            shutil.move(self.path, dest_path)
+        return True
+
+    def discard(self):
+        """Close and delete the spooled file if it was not committed"""
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    close = discard
+
+    def __getattr__(self, name):
+        # read/seek/tell/readline etc. for werkzeug's FileStorage
+        return getattr(self._file, name)
+
+
+class HashingRequest(Request):
+    """Request class that spools uploaded files through ``HashingSpool``"""
+
+    spool_folder = tempfile.gettempdir()
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingSpool(self.spool_folder)
+
+
+def file_digest(path):
+    """SHA-256 of a file on disk, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_upload(file, folder, extension):
+    """Store an uploaded ``FileStorage`` under its content hash
+
+    Returns ``(filename, sha256, created)``; ``created`` is False when an
+    identical file was already stored.
+    """
+    stream = file.stream
+    if not isinstance(stream, HashingSpool):
+        # Uploads parsed by a plain Request: spool and hash them here
+        stream = HashingSpool(HashingRequest.spool_folder)
+        try:
+            file.stream.seek(0)
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                stream.write(chunk)
+        except Exception:
+            stream.discard()
+            raise
+    digest = stream.hexdigest()
+    filename = f'{digest}{extension.lower()}'
+    created = stream.commit(os.path.join(folder, filename))
+    return filename, digest, created